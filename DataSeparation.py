@@ -1,47 +1,141 @@
 import csv
 import os
+from collections import OrderedDict
 
+from partition_manifest import build_manifests
+from partitioning import PARTITION_KEYS, get_partition_dir, get_partition_values
 
-def csv_reader(file_name):
-    """Открывает и читает необходимый файл, а также возвращяет полученный результат.
+
+class PartitionWriters:
+    """Ограниченный пул открытых на запись файлов с буферизованным выводом. Если открыто слишком много файлов, то
+    дольше всех не использовавшийся файл закрывается, а при следующей записи в него открывается на дозапись.
+
+    Attributes:
+        path (str): Директория для файлов
+        list_naming (list[str]): Заголовки для столбцов
+        keys (tuple[str]): Ключи разбиения, None - файлы по годам вида "<год>_year.csv"
+        max_open_files (int): Максимальное количество одновременно открытых файлов
+        buffer_size (int): Размер буфера записи каждого файла в байтах
+        files (OrderedDict): Открытые файлы и их csv.writer в порядке последнего использования
+        created (set): Ключи файлов, созданных за время работы
+    """
+
+    def __init__(self, path, list_naming, keys=None, max_open_files=16, buffer_size=1 << 20):
+        """Инициализирует пул.
+
+        Args:
+            path (str): Директория для файлов
+            list_naming (list[str]): Заголовки для столбцов
+            keys (tuple[str]): Ключи разбиения, None - файлы по годам вида "<год>_year.csv"
+            max_open_files (int): Максимальное количество одновременно открытых файлов
+            buffer_size (int): Размер буфера записи каждого файла в байтах
+        """
+        self.path = path
+        self.list_naming = list_naming
+        self.keys = keys
+        self.max_open_files = max_open_files
+        self.buffer_size = buffer_size
+        self.files = OrderedDict()
+        self.created = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get_file_name(self, key):
+        """Возвращает путь к файлу для ключа. При разбиении по ключам значения ключей кодируются в пути директорий
+        вида "ключ=значение".
+
+        Args:
+            key (int or tuple[str]): Год или значения ключей разбиения
+
+        Returns:
+            str: Путь к файлу
+        """
+        if self.keys is None:
+            return os.path.join(self.path, f'{key}_year.csv')
+        return os.path.join(get_partition_dir(self.path, self.keys, key), 'part.csv')
+
+    def get_writer(self, key):
+        """Возвращает csv.writer файла для ключа, при необходимости открывая файл и закрывая самый старый.
+
+        Args:
+            key (int or tuple[str]): Год или значения ключей разбиения
+
+        Returns:
+            csv.writer: Объект для записи строк в файл
+        """
+        if key in self.files:
+            self.files.move_to_end(key)
+            return self.files[key][1]
+        if len(self.files) >= self.max_open_files:
+            _, (old_file, _) = self.files.popitem(last=False)
+            old_file.close()
+        mode = 'a' if key in self.created else 'w'
+        file_name = self.get_file_name(key)
+        if key not in self.created:
+            os.makedirs(os.path.dirname(file_name), exist_ok=True)
+        file = open(file_name, mode, newline='', encoding="utf-8", buffering=self.buffer_size)
+        writer = csv.writer(file, delimiter=',', quoting=csv.QUOTE_MINIMAL)
+        if key not in self.created:
+            writer.writerow(self.list_naming)
+            self.created.add(key)
+        self.files[key] = (file, writer)
+        return writer
+
+    def writerow(self, key, row):
+        """Дописывает строку в файл для ключа.
+
+        Args:
+            key (int or tuple[str]): Год или значения ключей разбиения
+            row (list[str]): Строка данных
+        """
+        self.get_writer(key).writerow(row)
+
+    def close(self):
+        """Закрывает все открытые файлы."""
+        while self.files:
+            _, (file, _) = self.files.popitem()
+            file.close()
+
+
+def separate_file(file_name, path, keys=None, max_open_files=16, buffer_size=1 << 20):
+    """Разделяет файл по годам или по любому сочетанию ключей из PARTITION_KEYS за один проход: каждая
+    прочитанная строка сразу дописывается в файл своего раздела, поэтому в памяти находятся только буферы открытых
+    файлов, а не весь набор данных.
 
     Args:
-       file_name (str): Название файла для чтения
+        file_name (str): Название файла для чтения
+        path (str): Директория для файлов разделов
+        keys (tuple[str]): Ключи разбиения, например ('year', 'area_name'); None - файлы по годам "<год>_year.csv"
+        max_open_files (int): Максимальное количество одновременно открытых файлов
+        buffer_size (int): Размер буфера записи каждого файла в байтах
 
     Returns:
-        list(list), list: Полученные данные из прочитанного файла; строчка с названиями столбцов
+        list[int or tuple[str]]: Годы или значения ключей разделов, для которых были созданы файлы
     """
-
+    if keys is not None and not set(keys) <= set(PARTITION_KEYS):
+        raise ValueError(f'Ключи разбиения должны быть из {PARTITION_KEYS}')
     with open(file_name, encoding="utf-8-sig") as file:
-        reader = list(csv.reader(file))
-        try:
-            list_naming = reader.pop(0)
-        except Exception:
-            list_naming = None
-        file.close()
-        return reader, list_naming
+        reader = csv.reader(file)
+        list_naming = next(reader, None)
+        if list_naming is None:
+            return []
+        with PartitionWriters(path, list_naming, keys, max_open_files, buffer_size) as writers:
+            for row in reader:
+                key = int(row[5][:4]) if keys is None else get_partition_values(row, keys)
+                writers.writerow(key, row)
+            return sorted(writers.created)
 
 
-def separate_data(data):
-    """Разделяет входные данные по годам
+def create_directory(path):
+    """Создает директорию для хранения разделенных по годам файлов
 
     Args:
-        data (list(list)): Набор данных, которые необходимо разделить по годам
-    Returns:
-        dict(list(list)): Данные разделенные по годам
+        path (str): Путь к директории
     """
-    split_data = {}
-    for row in data:
-        year = int(row[5][:4])
-        if year not in split_data.keys():
-            split_data[year] = list()
-        split_data[year].append(row)
-    return split_data
-
-
-def create_directory():
-    """Создает директорию для хранения разделенных по годам файлов"""
-    path = os.getcwd() + '\years'
     try:
         os.mkdir(path)
     except OSError:
@@ -50,26 +144,11 @@ def create_directory():
         print(f'Успешно создана директория {path}')
 
 
-def create_files(data, list_naming):
-    """Создает csv файлы, где каждый файл хранит данные о вакансиях за один определенный год
-
-    Args:
-        data: Данные для записи в файлы
-        list_naming: Заголовки для столбцов
-    """
-    path = os.getcwd() + "\years\\"
-    for year in data.items():
-        with open(f'{path}{year[0]}_year.csv', 'w', newline='', encoding="utf-8") as csvfile:
-            filewriter = csv.writer(csvfile, delimiter=',', quoting=csv.QUOTE_MINIMAL)
-            filewriter.writerow(list_naming)
-            filewriter.writerows(year[1])
-
-
 def main():
-    data, list_naming = csv_reader('vacancies_by_year.csv')
-    split_data = separate_data(data)
-    create_directory()
-    create_files(split_data, list_naming)
+    path = os.path.join(os.getcwd(), 'years')
+    create_directory(path)
+    separate_file('vacancies_by_year.csv', path)
+    build_manifests(path)
 
 
 if __name__ == "__main__":
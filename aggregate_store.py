@@ -0,0 +1,339 @@
+import glob
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from aggregates import VacancyAggregate, add_grouped
+from date_parsing import parse_year_month
+from partition_manifest import is_stale
+from profession_matcher import ProfessionMatcher
+from rate_matrix import get_rate_matrix
+from snapshot import read_frame
+from vectorized_salary import get_salaries
+
+
+STORE_FILE = 'vacancies_aggregate.json'
+DAY_FILE_PATTERN = re.compile(r'^vacancies_for_(\d{4}-\d{2}-\d{2})\.csv$')
+
+
+def get_file_checksum(file_name):
+    """Вычисляет контрольную сумму содержимого файла.
+
+    Args:
+        file_name (str): Путь к файлу
+
+    Returns:
+        str: sha256 содержимого
+    """
+    checksum = hashlib.sha256()
+    with open(file_name, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            checksum.update(block)
+    return checksum.hexdigest()
+
+
+def get_day(file_name):
+    """Возвращает дату файла вакансий за день, записанного new_vacancies, или имя файла, если дата в нем не указана.
+
+    Args:
+        file_name (str): Путь к файлу
+
+    Returns:
+        str: Дата в формате "%Y-%m-%d" или имя файла
+
+    >>> get_day(os.path.join('new', 'vacancies_for_2022-12-20.csv'))
+    '2022-12-20'
+    """
+    name = os.path.basename(file_name)
+    match = DAY_FILE_PATTERN.match(name)
+    return match.group(1) if match is not None else name
+
+
+def write_json(file_name, data):
+    """Записывает данные в json файл через временный файл, чтобы прерванная запись не портила прежний файл.
+
+    Args:
+        file_name (str): Путь к файлу
+        data: Данные
+    """
+    temp_file = f'{file_name}.{os.getpid()}.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as file:
+        json.dump(data, file, ensure_ascii=False)
+    os.replace(temp_file, file_name)
+
+
+def aggregate_day(df, professions):
+    """Считает суммы зарплат и количества вакансий одного дня по профессиям, годам, месяцам и городам. Учитываются
+    только вакансии с известной зарплатой в рублях.
+
+    Args:
+        df (pd.DataFrame): Вакансии со столбцами name, salary, area_name, published_at
+        professions (list[str]): Названия профессий; все вакансии учитываются под профессией ''
+
+    Returns:
+        dict[tuple[str, int, int, str]: float], dict[tuple[str, int, int, str]: int]: Суммы и количества по
+        (профессия, год, месяц, город); вакансии без города учитываются под городом ''
+    """
+    sums = {}
+    counts = {}
+    suitable_vacancies = df[df['salary'].notna()]
+    salary = suitable_vacancies['salary']
+    years, months = parse_year_month(suitable_vacancies['published_at'])
+    years = pd.Series(years, index=salary.index)
+    months = pd.Series(months, index=salary.index)
+    areas = suitable_vacancies['area_name'].astype(object).fillna('')
+    add_grouped(sums, counts, [years, months, areas], salary)
+    cells = {('',) + key: value for key, value in sums.items()}, {('',) + key: value for key, value in counts.items()}
+    if professions:
+        matcher = ProfessionMatcher(professions)
+        names = suitable_vacancies['name'].astype('category')
+        found = [matcher.match(name) for name in names.cat.categories]
+        codes = names.cat.codes.to_numpy()
+        for index, profession in enumerate(professions):
+            matched = np.array([index in indices for indices in found] + [False])
+            mask = matched[codes]
+            sums, counts = {}, {}
+            add_grouped(sums, counts, [years[mask], months[mask], areas[mask]], salary[mask])
+            cells[0].update({(profession,) + key: value for key, value in sums.items()})
+            cells[1].update({(profession,) + key: value for key, value in counts.items()})
+    return cells
+
+
+class AggregateStore:
+    """Сохраняемая на диск статистика по вакансиям за дни из new_vacancies: суммы зарплат и количества вакансий по
+    профессиям, годам, месяцам и городам. Статистика хранится в двух частях: файл итогов с общими суммами и
+    количествами и описанием загруженных дней, и по файлу на вклад каждого дня в директории "<файл итогов>.days".
+    Открытие читает только итоги, а обновление проверяет файлы дней по размеру и времени изменения, читает и
+    записывает вклады только новых и изменившихся дней и перезаписывает итоги, поэтому ежедневное обновление не
+    зависит от длины истории. Повторная загрузка дня вычитает его прежний вклад и не учитывает вакансии дважды.
+
+    Attributes:
+        file_name (str): Путь к файлу итогов
+        days_dir (str): Директория вкладов дней
+        professions (list[str]): Профессии, по которым ведется статистика
+        days (dict[str: dict]): Загруженные дни: контрольная сумма, размер и время изменения файла, профессии и имя
+            файла вклада
+        sums (dict[tuple[str, int, int, str]: float]): Суммы зарплат по (профессия, год, месяц, город)
+        counts (dict[tuple[str, int, int, str]: int]): Количества вакансий по (профессия, год, месяц, город)
+        changed (bool): Итоги изменились после открытия или последнего сохранения
+        obsolete (list[str]): Файлы заменных вкладов дней, которые удаляются после сохранения итогов
+    """
+
+    def __init__(self, file_name=STORE_FILE, professions=()):
+        """Загружает итоги из файла, если он есть.
+
+        Args:
+            file_name (str): Путь к файлу итогов
+            professions (iterable[str]): Профессии, по которым нужна статистика; дни, загруженные без какой-то из
+                них, будут загружены заново при следующем обновлении
+        """
+        self.file_name = file_name
+        self.days_dir = f'{file_name}.days'
+        try:
+            with open(file_name, encoding='utf-8') as file:
+                state = json.load(file)
+            days = state['days']
+            stored_professions = state['professions']
+            sums, counts = state['sums'], state['counts']
+        except (OSError, ValueError, KeyError):
+            days = {}
+            stored_professions = []
+            sums, counts = [], []
+        self.professions = list(dict.fromkeys(stored_professions + list(professions)))
+        self.days = days
+        self.sums = {tuple(cell[:4]): cell[4] for cell in sums}
+        self.counts = {tuple(cell[:4]): cell[4] for cell in counts}
+        self.changed = False
+        self.obsolete = []
+
+    def get_delta_name(self, day, checksum):
+        """Возвращает имя файла вклада дня. Имя зависит от содержимого файла дня и профессий, поэтому новый
+        вклад не затирает прежний, пока итоги, из которых прежний еще не вычтен, не сохранены.
+
+        Args:
+            day (str): Дата
+            checksum (str): Контрольная сумма файла дня
+
+        Returns:
+            str: Имя файла вклада
+
+        >>> AggregateStore('missing.json', ['Инженер']).get_delta_name('2022-12-20', '0' * 64)[:11]
+        '2022-12-20.'
+        """
+        key = hashlib.sha256('\n'.join([checksum] + self.professions).encode('utf-8')).hexdigest()
+        return f'{day}.{key[:16]}.json'
+
+    def load_day(self, day):
+        """Читает сохраненный вклад загруженного дня.
+
+        Args:
+            day (str): Дата
+
+        Returns:
+            dict[tuple[str, int, int, str]: float], dict[tuple[str, int, int, str]: int]: Суммы и количества дня
+        """
+        with open(os.path.join(self.days_dir, self.days[day]['delta']), encoding='utf-8') as file:
+            delta = json.load(file)
+        return ({tuple(cell[:4]): cell[4] for cell in delta['sums']},
+                {tuple(cell[:4]): cell[4] for cell in delta['counts']})
+
+    def save_day(self, delta_name, sums, counts):
+        """Атомарно записывает вклад дня.
+
+        Args:
+            delta_name (str): Имя файла вклада
+            sums (dict[tuple[str, int, int, str]: float]): Суммы зарплат дня
+            counts (dict[tuple[str, int, int, str]: int]): Количества вакансий дня
+        """
+        os.makedirs(self.days_dir, exist_ok=True)
+        write_json(os.path.join(self.days_dir, delta_name),
+                   {'sums': [list(key) + [value] for key, value in sums.items()],
+                    'counts': [list(key) + [value] for key, value in counts.items()]})
+
+    def add_cells(self, sums, counts, sign=1):
+        """Добавляет к итогам вклад дня или, если sign=-1, вычитает его.
+
+        Args:
+            sums (dict[tuple[str, int, int, str]: float]): Суммы зарплат дня
+            counts (dict[tuple[str, int, int, str]: int]): Количества вакансий дня
+            sign (int): 1 - добавить, -1 - вычесть
+        """
+        for key, value in sums.items():
+            self.sums[key] = self.sums.get(key, 0) + sign * value
+        for key, value in counts.items():
+            self.counts[key] = self.counts.get(key, 0) + sign * value
+            if self.counts[key] == 0:
+                del self.counts[key]
+                del self.sums[key]
+
+    def is_current(self, day, file_name):
+        """Проверяет, что день уже загружен из файла с тем же содержимым и по всем нужным профессиям. Файл,
+        размер и время изменения которого не изменились, не читается.
+
+        Args:
+            day (str): Дата
+            file_name (str): Путь к файлу дня
+
+        Returns:
+            bool: True, если день загружать не нужно
+        """
+        entry = self.days.get(day)
+        if entry is None or not set(self.professions) <= set(entry['professions']):
+            return False
+        if not is_stale(entry, file_name):
+            return True
+        if entry['sha256'] != get_file_checksum(file_name):
+            return False
+        stat = os.stat(file_name)
+        entry.update(bytes=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        self.changed = True
+        return True
+
+    def ingest(self, file_name):
+        """Добавляет в статистику файл вакансий за день. Если день уже был загружен из того же файла, ничего не
+        меняется; если файл изменился, прежний вклад дня вычитается из итогов и заменяется новым.
+
+        Args:
+            file_name (str): Путь к файлу вакансий за день
+
+        Returns:
+            bool: True, если статистика изменилась
+        """
+        day = get_day(file_name)
+        if self.is_current(day, file_name):
+            return False
+        stat = os.stat(file_name)
+        checksum = get_file_checksum(file_name)
+        df = read_frame(file_name)
+        df['salary'] = get_salaries(df, get_rate_matrix())
+        sums, counts = aggregate_day(df, self.professions)
+        delta_name = self.get_delta_name(day, checksum)
+        if day in self.days:
+            self.add_cells(*self.load_day(day), sign=-1)
+            if self.days[day]['delta'] != delta_name:
+                self.obsolete.append(os.path.join(self.days_dir, self.days[day]['delta']))
+        self.save_day(delta_name, sums, counts)
+        self.add_cells(sums, counts)
+        self.days[day] = {'sha256': checksum, 'bytes': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                          'professions': self.professions, 'delta': delta_name}
+        self.changed = True
+        return True
+
+    def update(self, files):
+        """Добавляет в статистику новые и изменившиеся файлы и сохраняет итоги, если они изменились.
+
+        Args:
+            files (iterable[str]): Пути к файлам вакансий за день
+
+        Returns:
+            list[str]: Даты загруженных файлов
+        """
+        ingested = [get_day(file_name) for file_name in sorted(files) if self.ingest(file_name)]
+        if self.changed:
+            self.save()
+        return ingested
+
+    def save(self):
+        """Записывает итоги во временный файл и заменяет им файл итогов, чтобы прерванная запись не портила
+        сохраненное состояние, а затем удаляет замененные вклады дней."""
+        write_json(self.file_name, {'professions': self.professions, 'days': dict(sorted(self.days.items())),
+                                    'sums': [list(key) + [value] for key, value in self.sums.items()],
+                                    'counts': [list(key) + [value] for key, value in self.counts.items()]})
+        for file_name in self.obsolete:
+            try:
+                os.remove(file_name)
+            except OSError:
+                pass
+        self.obsolete = []
+        self.changed = False
+
+    def get_aggregate(self, profession_name, area_name=None, by_region=False):
+        """Собирает из сохраненной статистики VacancyAggregate, как если бы все загруженные дни были обработаны
+        aggregate_dataframe.
+
+        Args:
+            profession_name (str): Название профессии из professions
+            area_name (str): Название региона, None - не собирать статистику по региону
+            by_region (bool): Собрать матрицу годы x регионы
+
+        Returns:
+            VacancyAggregate: Статистика
+        """
+        if profession_name not in self.professions:
+            raise ValueError(f'Статистика по профессии {profession_name} не ведется')
+        aggregate = VacancyAggregate()
+        for key, count in self.counts.items():
+            profession, year, _, area = key
+            salary_sum = self.sums[key]
+            if profession == '':
+                targets = [(aggregate.year_sum, aggregate.year_count, year)]
+                if area != '':
+                    targets.append((aggregate.city_sum, aggregate.city_count, area))
+                if area != '' and area == area_name:
+                    targets.append((aggregate.area_sum, aggregate.area_count, year))
+                if area != '' and by_region:
+                    targets.append((aggregate.region_sum, aggregate.region_count, (year, area)))
+            elif profession == profession_name:
+                targets = [(aggregate.profession_sum, aggregate.profession_count, year)]
+            else:
+                continue
+            for sums, counts, key in targets:
+                sums[key] = sums.get(key, 0) + salary_sum
+                counts[key] = counts.get(key, 0) + count
+        return aggregate
+
+
+def main():
+    profession_name = input('Введите название профессии: ')
+    store = AggregateStore(STORE_FILE, [profession_name])
+    ingested = store.update(glob.glob('vacancies_for_*.csv'))
+    print(f'Загружено дней: {len(ingested)}')
+    print(store.get_aggregate(profession_name).get_year_dataframe())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+import pandas as pd
+
+from date_parsing import parse_year_month
+
+
+class VacancyAggregate:
+    """Частичная статистика по части вакансий: суммы зарплат и количества вакансий по годам, по годам для выбранной
+    профессии и региона и по городам. Частичные статистики разных файлов объединяются сложением, поэтому процессам
+    достаточно передавать в родительский процесс несколько килобайт вместо всех вакансий.
+
+    Attributes:
+        year_sum (dict[int: float]): Сумма зарплат по годам
+        year_count (dict[int: int]): Количество вакансий по годам
+        profession_sum (dict[int: float]): Сумма зарплат по годам для выбранной профессии
+        profession_count (dict[int: int]): Количество вакансий по годам для выбранной профессии
+        area_sum (dict[int: float]): Сумма зарплат по годам для выбранного региона
+        area_count (dict[int: int]): Количество вакансий по годам для выбранного региона
+        city_sum (dict[str: float]): Сумма зарплат по городам
+        city_count (dict[str: int]): Количество вакансий по городам
+        region_sum (dict[tuple[int, str]: float]): Сумма зарплат по годам и регионам
+        region_count (dict[tuple[int, str]: int]): Количество вакансий по годам и регионам
+        heads (dict[str or tuple: pd.DataFrame]): Первые строки каждого исходного файла или его диапазона
+    """
+
+    def __init__(self):
+        """Создает пустую частичную статистику."""
+        self.year_sum = {}
+        self.year_count = {}
+        self.profession_sum = {}
+        self.profession_count = {}
+        self.area_sum = {}
+        self.area_count = {}
+        self.city_sum = {}
+        self.city_count = {}
+        self.region_sum = {}
+        self.region_count = {}
+        self.heads = {}
+
+    def merge(self, other):
+        """Добавляет к статистике другую частичную статистику.
+
+        Args:
+            other (VacancyAggregate): Частичная статистика другой части вакансий
+
+        Returns:
+            VacancyAggregate: Объединенная статистика (self)
+        """
+        for name in ('year_sum', 'year_count', 'profession_sum', 'profession_count', 'area_sum', 'area_count',
+                     'city_sum', 'city_count', 'region_sum', 'region_count'):
+            counter = getattr(self, name)
+            for key, value in getattr(other, name).items():
+                counter[key] = counter.get(key, 0) + value
+        self.heads.update(other.heads)
+        return self
+
+    def get_years(self):
+        """Возвращает годы, по которым есть вакансии.
+
+        Returns:
+            list[int]: Годы по возрастанию
+        """
+        return sorted(self.year_count.keys())
+
+    def get_year_statistics(self):
+        """Возвращает статистику по годам в формате print_statistic из pd_currency_conversion.
+
+        Returns:
+            list[list]: Для каждого года: год, уровень зарплат, количество вакансий, уровень зарплат и количество
+            вакансий для выбранной профессии
+
+        >>> aggregate = VacancyAggregate()
+        >>> aggregate.year_sum, aggregate.year_count = {2007: 90000.0}, {2007: 2}
+        >>> aggregate.profession_sum, aggregate.profession_count = {2007: 40000.0}, {2007: 1}
+        >>> aggregate.get_year_statistics()
+        [[2007, 45000, 2, 40000, 1]]
+        """
+        return [[year, get_mean(self.year_sum, self.year_count, year), self.year_count[year],
+                 get_mean(self.profession_sum, self.profession_count, year), self.profession_count.get(year, 0)]
+                for year in self.get_years()]
+
+    def get_year_dataframe(self, with_area=False, area_name=None, region_tables=None):
+        """Возвращает таблицу статистики по годам для Report из statistics_by_years или, если with_area, из
+        statistics_by_city.
+
+        Args:
+            with_area (bool): Добавить столбцы статистики по выбранному региону
+            area_name (str): Регион, статистику по которому взять из матрицы годы x регионы; None - регион, выбранный
+                при сборе статистики
+            region_tables (tuple[pd.DataFrame, pd.DataFrame]): Результат get_region_tables, чтобы не собирать его
+                заново для каждого региона; None - собрать
+
+        Returns:
+            pd.DataFrame: Статистика по годам
+        """
+        years = self.get_years()
+        area_sum, area_count = self.area_sum, self.area_count
+        if area_name is not None:
+            sums, counts = self.get_region_tables() if region_tables is None else region_tables
+            area_sum = sums[area_name].to_dict() if area_name in sums else {}
+            area_count = counts[area_name].to_dict() if area_name in counts else {}
+        statistic_year = pd.DataFrame({'year': years})
+        statistic_year['salary_by_years'] = [get_mean(self.year_sum, self.year_count, year) for year in years]
+        statistic_year['salary_by_years_profession'] = [get_mean(self.profession_sum, self.profession_count, year)
+                                                        for year in years]
+        if with_area:
+            statistic_year['salary_by_years_city'] = [get_mean(area_sum, area_count, year) for year in years]
+        statistic_year['number_vac_by_years'] = [self.year_count[year] for year in years]
+        statistic_year['number_profession_by_years'] = [self.profession_count.get(year, 0) for year in years]
+        if with_area:
+            statistic_year['number_city_by_years'] = [area_count.get(year, 0) for year in years]
+        return statistic_year
+
+    def get_regions(self):
+        """Возвращает регионы, по которым собрана матрица годы x регионы.
+
+        Returns:
+            list[str]: Регионы по алфавиту
+        """
+        return sorted({area for _, area in self.region_count})
+
+    def get_region_tables(self):
+        """Возвращает суммы зарплат и количества вакансий по годам и регионам в виде таблиц, собранных одним
+        unstack, а не перебором ячеек.
+
+        Returns:
+            pd.DataFrame, pd.DataFrame: Суммы зарплат и количества вакансий, строки - годы, столбцы - регионы
+
+        >>> aggregate = VacancyAggregate()
+        >>> aggregate.year_count = {2007: 3, 2008: 1}
+        >>> aggregate.region_sum, aggregate.region_count = {(2007, 'Омск'): 3.0}, {(2007, 'Омск'): 2}
+        >>> [table.to_dict() for table in aggregate.get_region_tables()]
+        [{'Омск': {2007: 3.0, 2008: 0.0}}, {'Омск': {2007: 2, 2008: 0}}]
+        """
+        index = pd.Index(self.get_years(), name='year')
+        regions = self.get_regions()
+        tables = []
+        for values, dtype in ((self.region_sum, 'float64'), (self.region_count, 'int64')):
+            if values:
+                table = pd.Series(values, dtype=dtype).unstack(fill_value=0)
+                table = table.reindex(index=index, columns=regions, fill_value=0)
+            else:
+                table = pd.DataFrame(index=index, columns=regions, dtype=dtype)
+            table.columns.name = None
+            tables.append(table)
+        return tables[0], tables[1]
+
+    def get_region_matrix(self):
+        """Возвращает матрицы уровня зарплат и количества вакансий по годам и регионам.
+
+        Returns:
+            pd.DataFrame, pd.DataFrame: Уровень зарплат и количество вакансий, строки - годы, столбцы - регионы
+
+        >>> aggregate = VacancyAggregate()
+        >>> aggregate.year_count = {2007: 3, 2008: 1}
+        >>> aggregate.region_sum, aggregate.region_count = {(2007, 'Омск'): 30001.0, (2008, 'Москва'): 5.0}, {(2007, 'Омск'): 2, (2008, 'Москва'): 1}
+        >>> salary, count = aggregate.get_region_matrix()
+        >>> salary.to_dict(), count.to_dict()
+        ({'Москва': {2007: 0, 2008: 5}, 'Омск': {2007: 15000, 2008: 0}}, {'Москва': {2007: 0, 2008: 1}, 'Омск': {2007: 2, 2008: 0}})
+        """
+        sums, count = self.get_region_tables()
+        salary = (sums / count.where(count > 0)).fillna(0).astype('int64')
+        return salary, count
+
+    def get_city_dataframe(self, percentage_column='percentage_by_city', salary_column='salary_by_city'):
+        """Возвращает статистику по городам для отчетов: долю вакансий и уровень зарплат для городов, в которых
+        не меньше 1% вакансий.
+
+        Args:
+            percentage_column (str): Название столбца доли вакансий
+            salary_column (str): Название столбца уровня зарплат
+
+        Returns:
+            pd.DataFrame: Статистика по городам с индексом area_name
+
+        >>> aggregate = VacancyAggregate()
+        >>> aggregate.year_count = {2007: 200}
+        >>> aggregate.city_sum, aggregate.city_count = {'Москва': 300.0, 'Омск': 10.0}, {'Москва': 199, 'Омск': 1}
+        >>> aggregate.get_city_dataframe().to_dict()
+        {'percentage_by_city': {'Москва': 0.995, 'Омск': 0.005}, 'salary_by_city': {'Москва': 2.0, 'Омск': nan}}
+        """
+        counts = pd.Series(self.city_count, dtype='int64').sort_values(ascending=False, kind='stable')
+        counts.index.name = 'area_name'
+        sums = pd.Series(self.city_sum, dtype='float64').reindex(counts.index)
+        statistic_city = pd.DataFrame(index=counts.index)
+        statistic_city[percentage_column] = (counts / sum(self.year_count.values())).round(4)
+        salary = (sums / counts).round(0)
+        statistic_city[salary_column] = salary.where(statistic_city[percentage_column] >= 0.01)
+        return statistic_city
+
+    def get_head(self, size=100):
+        """Возвращает первые строки данных в порядке имен исходных файлов и начал диапазонов.
+
+        Args:
+            size (int): Количество строк
+
+        Returns:
+            pd.DataFrame: Первые строки
+        """
+        if not self.heads:
+            return pd.DataFrame()
+        return pd.concat([self.heads[name] for name in sorted(self.heads)], ignore_index=True).head(size)
+
+
+def get_mean(sums, counts, key):
+    """Вычисляет целую часть среднего значения, 0 если значений нет.
+
+    Args:
+        sums (dict): Суммы
+        counts (dict): Количества
+        key: Ключ
+
+    Returns:
+        int: Целая часть среднего значения
+    """
+    count = counts.get(key, 0)
+    return int(sums[key] / count) if count else 0
+
+
+def add_grouped(sums, counts, keys, salary):
+    """Добавляет суммы и количества, сгруппированные по ключам.
+
+    Args:
+        sums (dict): Суммы
+        counts (dict): Количества
+        keys (pd.Series or list[pd.Series]): Ключи группировки, для нескольких ключей - кортежи значений
+        salary (pd.Series): Зарплаты
+    """
+    grouped = salary.groupby(keys, sort=False, observed=True).agg(['sum', 'count'])
+    for key, salary_sum, count in zip(grouped.index.tolist(), grouped['sum'].tolist(), grouped['count'].tolist()):
+        sums[key] = sums.get(key, 0) + salary_sum
+        counts[key] = counts.get(key, 0) + count
+
+
+def aggregate_dataframe(df, profession_name, area_name=None, source=None, head_size=0, by_region=False):
+    """Вычисляет частичную статистику по вакансиям одного файла. Учитываются только вакансии с известной
+    зарплатой.
+
+    Args:
+        df (pd.DataFrame): Вакансии со столбцами name, salary, area_name, published_at
+        profession_name (str): Название профессии
+        area_name (str): Название региона, None - не собирать статистику по региону
+        source (str or tuple): Имя исходного файла или (имя, начало диапазона) для сохранения первых строк
+        head_size (int): Сколько первых строк сохранить
+        by_region (bool): Собрать матрицу годы x регионы одной группировкой, чтобы потом получать статистику по любому
+            региону
+
+    Returns:
+        VacancyAggregate: Частичная статистика
+    """
+    aggregate = VacancyAggregate()
+    if df is None:
+        return aggregate
+    if head_size and source is not None:
+        aggregate.heads[source] = df.head(head_size)
+    suitable_vacancies = df[df['salary'].notna()]
+    salary = suitable_vacancies['salary']
+    years = pd.Series(parse_year_month(suitable_vacancies['published_at'])[0], index=suitable_vacancies.index)
+    profession_mask = suitable_vacancies['name'].str.contains(profession_name, regex=True).to_numpy()
+    add_grouped(aggregate.year_sum, aggregate.year_count, years, salary)
+    add_grouped(aggregate.profession_sum, aggregate.profession_count, years[profession_mask], salary[profession_mask])
+    if area_name is not None:
+        area_mask = (suitable_vacancies['area_name'] == area_name).to_numpy()
+        add_grouped(aggregate.area_sum, aggregate.area_count, years[area_mask], salary[area_mask])
+    add_grouped(aggregate.city_sum, aggregate.city_count, suitable_vacancies['area_name'], salary)
+    if by_region:
+        add_grouped(aggregate.region_sum, aggregate.region_count, [years, suitable_vacancies['area_name']], salary)
+    return aggregate
+
+
+def merge_aggregates(aggregates):
+    """Объединяет частичные статистики.
+
+    Args:
+        aggregates (iterable[VacancyAggregate]): Частичные статистики
+
+    Returns:
+        VacancyAggregate: Общая статистика
+    """
+    result = VacancyAggregate()
+    for aggregate in aggregates:
+        result.merge(aggregate)
+    return result
@@ -7,8 +7,9 @@ import csv
 import numpy as np
 import pandas as pd
 
+from rate_matrix import get_rate_matrix, init_rates
 
-currencies_df = pd.read_csv('currencies.csv')
+CURRENCIES_FILE = 'currencies.csv'
 
 
 class DataSet:
@@ -154,19 +155,20 @@ class Salary:
             self.salary = None
 
     def convert_to_rubles(self, salary):
-        """Вычисляет среднее значение зарплаты и конвертирует в рубли, при помощи словоря - currency_to_rub.
+        """Конвертирует зарплату в рубли по курсу месяца публикации из матрицы курсов файла CURRENCIES_FILE.
+
+            Args:
+                salary (float): Зарплата в валюте вакансии
 
             Returns:
-                float: Cреднее значение зарплаты в рублях
+                float: Зарплата в рублях, None если курс неизвестен
         """
-        try:
-            if self.salary_currency == "RUR":
-                return salary
-            else:
-                index = currencies_df.index[currencies_df['date'] == self.date]
-                return int(salary * currencies_df.loc[index, self.salary_currency].values[0])
-        except:
+        if self.salary_currency == "RUR":
+            return salary
+        rate = get_rate_matrix(CURRENCIES_FILE).get_rate(self.date, self.salary_currency)
+        if math.isnan(rate):
             return None
+        return int(salary * rate)
 
 
 def csv_reader(file_name):
@@ -245,7 +247,7 @@ def main():
     # profession_name = input('Введите название профессии: ')
     profession_name = 'Аналитик'
     files = [os.getcwd() + f'\\{name_file}\\' + file for file in os.listdir(os.getcwd() + f'\\{name_file}\\')]
-    with Pool(8) as p:
+    with Pool(8, init_rates, (CURRENCIES_FILE, get_rate_matrix(CURRENCIES_FILE))) as p:
         data_years = p.map(get_data, files)
         tuples_data_profession = [(data, profession_name) for data in data_years]
         statistic_year = p.starmap(get_statistic, tuples_data_profession)
@@ -1,8 +1,15 @@
 import csv
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
 import xml.etree.ElementTree as ET
 import pandas as pd
 
+from date_parsing import get_year_month
+from http_cache import CachedSession, immutable_after
+
+CBR_URL = 'http://www.cbr.ru/scripts/XML_daily.asp'
+
 
 def csv_reader(file_name):
     with open(file_name, encoding="utf-8-sig") as file:
@@ -26,31 +33,77 @@ def calculate_currency_frequency(data):
     return currency_frequency, satisfying_currencies
 
 
-def collect_currency_rates(data, currencies):
-    sorted_data = sorted(data, key=lambda vacancy: parse_date(vacancy[5]))
-    first_date = parse_date(sorted_data[0][5])
-    last_date = parse_date(sorted_data[len(sorted_data) - 1][5])
-    number_months = (int(last_date[0]) - int(first_date[0])) * 12 + int(last_date[1]) - int(first_date[1]) + 1
-    currency_rates = {'date': []}
-    currency_rates.update({currency: [] for currency in currencies if currency != 'RUR'})
-    for i in range(number_months):
-        date = [first_date[0] + ((first_date[1] + i - 1) // 12), ((first_date[1] + i - 1) % 12) + 1]
-        currency_rates['date'].append(f"{date[0]}-{date[1]:02}")
-        response = requests.get(f"http://www.cbr.ru/scripts/XML_daily.asp?date_req=01/{date[1]:02}/{date[0]}&d=0")
-        root = ET.fromstring(response.text)
-        for child in root:
-            valute = [i.text for i in child]
-            if valute[1] in currencies:
-                currency_rates[valute[1]].append(round(float(valute[4].replace(',', '.'))/int(valute[2]), 5))
-        for key, value in currency_rates.items():
-            if len(currency_rates['date']) != len(currency_rates[key]):
-                currency_rates[key].append(None)
+def collect_currency_rates(data, currencies, max_workers=8, cache_dir='cbr_cache', base_url=CBR_URL):
+    """Собирает курсы валют на первое число каждого месяца в диапазоне дат публикации вакансий. Месяцы
+    запрашиваются параллельно через общую сессию с пулом соединений, а ответы сохраняются в кэш ответов на диске.
+    Курсы на прошедшие даты не меняются, поэтому при повторном запуске запрашиваются только недостающие месяцы.
+
+    Args:
+        data (list[list[str]]): Вакансии
+        currencies (list[str]): Валюты, курсы которых необходимо собрать
+        max_workers (int): Максимальное количество одновременных запросов
+        cache_dir (str): Директория кэша ответов, None - не использовать кэш
+        base_url (str): Адрес сервиса курсов валют
+
+    Returns:
+        dict[str: list]: Даты в формате "%Y-%m" и курсы валют на каждую дату
+    """
+    dates = [get_year_month(vacancy[5]) for vacancy in data]
+    first_date = min(dates)
+    last_date = max(dates)
+    number_months = (last_date[0] - first_date[0]) * 12 + last_date[1] - first_date[1] + 1
+    months = [(first_date[0] + (first_date[1] + i - 1) // 12, (first_date[1] + i - 1) % 12 + 1)
+              for i in range(number_months)]
+    with requests.Session() as session:
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        client = session
+        if cache_dir is not None:
+            client = CachedSession(session, cache_dir, immutable_after('date_req', '%d/%m/%Y'))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            month_rates = list(executor.map(lambda date: get_month_rates(client, base_url, date), months))
+
+    currency_rates = {'date': [f"{year}-{month:02}" for year, month in months]}
+    currency_rates.update({currency: [rates.get(currency) for rates in month_rates]
+                           for currency in currencies if currency != 'RUR'})
     return currency_rates
 
 
-def parse_date(date):
-    parsed_date = date.replace('T', '-').replace(':', '-').replace('+', '-').split('-')
-    return int(parsed_date[0]), int(parsed_date[1])
+def get_month_rates(session, base_url, date):
+    """Возвращает курсы всех валют на первое число месяца.
+
+    Args:
+        session (requests.Session or CachedSession): Сессия с пулом соединений, возможно с кэшем ответов
+        base_url (str): Адрес сервиса курсов валют
+        date (tuple[int, int]): Год и месяц
+
+    Returns:
+        dict[str: float]: Курсы валют к рублю за одну единицу валюты
+    """
+    year, month = date
+    response = session.get(f"{base_url}?date_req=01/{month:02}/{year}&d=0")
+    response.raise_for_status()
+    return parse_rates(response.text)
+
+
+def parse_rates(text):
+    """Разбирает ответ сервиса курсов валют.
+
+    Args:
+        text (str): XML со списком валют
+
+    Returns:
+        dict[str: float]: Курсы валют к рублю за одну единицу валюты
+
+    >>> parse_rates('<ValCurs><Valute><NumCode>840</NumCode><CharCode>USD</CharCode><Nominal>1</Nominal><Name>Доллар США</Name><Value>31,7844</Value></Valute></ValCurs>')
+    {'USD': 31.7844}
+    """
+    rates = {}
+    for child in ET.fromstring(text):
+        valute = [i.text for i in child]
+        rates[valute[1]] = round(float(valute[4].replace(',', '.')) / int(valute[2]), 5)
+    return rates
 
 
 def main():
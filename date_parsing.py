@@ -0,0 +1,59 @@
+from functools import lru_cache
+
+import numpy as np
+
+
+def parse_year_month(dates):
+    """Векторно выделяет год и месяц из дат формата "%Y-%m-%dT%H:%M:%S%z". Формат имеет фиксированную ширину,
+    поэтому даты обрезаются до первых 7 символов одним преобразованием массива, а цифры года и месяца читаются по
+    постоянным смещениям без разбиения строк.
+
+    Args:
+        dates (iterable[str]): Даты публикации, например столбец published_at
+
+    Returns:
+        np.ndarray, np.ndarray: Годы и месяцы, 0 для пропущенных и некорректных дат
+
+    >>> parse_year_month(['2007-12-03T17:34:36+0300', '2022-01-31T00:00:00+0300', None, 'дата'])
+    (array([2007, 2022,    0,    0]), array([12,  1,  0,  0]))
+    """
+    prefixes = np.asarray(dates, dtype=object).astype('U7')
+    if len(prefixes) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    chars = prefixes.view(np.uint32).reshape(len(prefixes), 7)
+    digits = chars - np.uint32(ord('0'))
+    valid = (digits[:, [0, 1, 2, 3, 5, 6]] <= 9).all(axis=1) & (chars[:, 4] == ord('-'))
+    years = (digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]).astype(np.int64)
+    months = (digits[:, 5] * 10 + digits[:, 6]).astype(np.int64)
+    years[~valid] = 0
+    months[~valid] = 0
+    return years, months
+
+
+@lru_cache(maxsize=4096)
+def parse_prefix(prefix):
+    """Разбирает префикс даты "%Y-%m". Результаты запоминаются, поэтому для миллионов вакансий с несколькими
+    сотнями различных месяцев преобразование строк в числа выполняется несколько сотен раз.
+
+    Args:
+        prefix (str): Префикс даты
+
+    Returns:
+        tuple[int, int]: Год и месяц
+    """
+    return int(prefix[:4]), int(prefix[5:7])
+
+
+def get_year_month(date):
+    """Возвращает год и месяц даты формата "%Y-%m-%dT%H:%M:%S%z" с запоминанием по префиксу "%Y-%m".
+
+    Args:
+        date (str): Дата публикации
+
+    Returns:
+        tuple[int, int]: Год и месяц
+
+    >>> get_year_month('2007-12-03T17:34:36+0300')
+    (2007, 12)
+    """
+    return parse_prefix(date[:7])
@@ -0,0 +1,107 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from multiprocessing import Pool
+
+
+BACKENDS = ('auto', 'serial', 'threads', 'processes', 'futures')
+SERIAL_THRESHOLD = 8 << 20
+MIN_WORKER_BYTES = 4 << 20
+
+
+def get_task_size(task):
+    """Оценивает объем работы задания в байтах.
+
+    Args:
+        task (str or tuple[str, int, int]): Путь к файлу или диапазон файла из plan_chunks
+
+    Returns:
+        int: Размер задания в байтах
+
+    >>> get_task_size(('2022_year.csv', 100, 600))
+    500
+    """
+    if isinstance(task, tuple):
+        file_name, start, end = task
+        return (os.path.getsize(file_name) if end is None else end) - start
+    return os.path.getsize(task)
+
+
+def get_workers(sizes, max_workers=None):
+    """Подбирает количество обработчиков: не больше числа ядер и числа заданий и не больше, чем нужно, чтобы на
+    каждого обработчика приходилось хотя бы MIN_WORKER_BYTES данных.
+
+    Args:
+        sizes (list[int]): Размеры заданий в байтах
+        max_workers (int): Ограничение количества обработчиков, None - os.cpu_count()
+
+    Returns:
+        int: Количество обработчиков
+
+    >>> get_workers([100 << 20] * 3, max_workers=8), get_workers([1 << 20] * 20, max_workers=8)
+    (3, 5)
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    by_size = -(-sum(sizes) // MIN_WORKER_BYTES)
+    return max(1, min(max_workers, len(sizes), by_size))
+
+
+def choose_backend(sizes, backend='auto', workers=None):
+    """Выбирает способ выполнения. При backend='auto' маленькие наборы заданий выполняются последовательно, так как
+    запуск пула процессов занимает больше времени, чем он экономит, остальные - в пуле процессов.
+
+    Args:
+        sizes (list[int]): Размеры заданий в байтах
+        backend (str): Способ выполнения из BACKENDS
+        workers (int): Количество обработчиков
+
+    Returns:
+        str: Способ выполнения без 'auto'
+
+    >>> choose_backend([1 << 20]), choose_backend([100 << 20] * 4, workers=4), choose_backend([1], 'threads')
+    ('serial', 'processes', 'threads')
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f'Способ выполнения должен быть из {BACKENDS}')
+    if backend != 'auto':
+        return backend
+    if sum(sizes) < SERIAL_THRESHOLD or len(sizes) < 2 or workers == 1:
+        return 'serial'
+    return 'processes'
+
+
+def run_tasks(func, tasks, backend='auto', max_workers=None, initializer=None, initargs=(), sizes=None):
+    """Выполняет функцию для каждого задания и возвращает результаты по мере их готовности, не дожидаясь самого
+    долгого задания. Порядок результатов не гарантируется.
+
+    Args:
+        func (callable): Функция от одного задания, для процессов - доступная по имени модуля
+        tasks (list[str or tuple]): Задания: пути к файлам или диапазоны из plan_chunks
+        backend (str): Способ выполнения: 'serial', 'threads', 'processes' (multiprocessing.Pool), 'futures'
+            (concurrent.futures.ProcessPoolExecutor) или 'auto'
+        max_workers (int): Ограничение количества обработчиков, None - os.cpu_count()
+        initializer (callable): Функция, вызываемая один раз в каждом обработчике перед заданиями
+        initargs (tuple): Аргументы initializer
+        sizes (list[int]): Размеры заданий в байтах, None - вычислить по заданиям через get_task_size
+
+    Returns:
+        iterator: Результаты func
+    """
+    tasks = list(tasks)
+    if sizes is None:
+        sizes = [get_task_size(task) for task in tasks]
+    workers = get_workers(sizes, max_workers)
+    backend = choose_backend(sizes, backend, workers)
+    if backend == 'serial':
+        if initializer is not None:
+            initializer(*initargs)
+        for task in tasks:
+            yield func(task)
+    elif backend == 'processes':
+        with Pool(workers, initializer, initargs) as p:
+            yield from p.imap_unordered(func, tasks)
+    else:
+        executor_class = ThreadPoolExecutor if backend == 'threads' else ProcessPoolExecutor
+        with executor_class(workers, initializer=initializer, initargs=initargs) as executor:
+            for future in as_completed([executor.submit(func, task) for task in tasks]):
+                yield future.result()
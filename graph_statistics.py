@@ -6,6 +6,10 @@ import re
 from datetime import datetime
 import doctest
 
+from date_parsing import get_year_month
+from snapshot import read_snapshot_rows
+from vocabulary import Vocabulary
+
 currency_to_rub = {"AZN": 35.68,
                    "BYR": 23.91,
                    "EUR": 59.90,
@@ -33,15 +37,20 @@ class DataSet:
     Attributes:
         file_name (str): Имя исходного файла с данными
         vacancies_objects (list[Vacancy]): Лист вакансий со всеми заполненными значениями
+        names (Vocabulary): Словарь названий вакансий
+        areas (Vocabulary): Словарь регионов, коды регионов хранятся в Vacancy.area_code
+        currencies (Vocabulary): Словарь валют оклада
         statistic (list[dict[int: int or str: int]]): Статистика по вакансиям
     """
 
-    def __init__(self, file_name, vacancies_objects):
+    def __init__(self, file_name, vacancies_objects, stream=False):
         """Инициализирует объект DataSet.
 
         Args:
             file_name (str): Имя исходного файла с данными
             vacancies_objects (list): Лист вакансий для обработки
+            stream (bool): Потоковый режим: вакансии не хранятся в памяти, а читаются из файла по одной строке при
+                каждом подсчете статистики
 
         >>> type(DataSet('unittest.csv', [['IT аналитик', '35000.0', '45000.0','RUR', 'Санкт-Петербург', '2007-12-03T17:34:36+0300']])).__name__
         'DataSet'
@@ -66,9 +75,39 @@ class DataSet:
         """
 
         self.file_name = file_name
-        self.vacancies_objects = [Vacancy(row) for row in vacancies_objects if None not in row and '' not in row]
+        self.stream = stream
+        self.names = Vocabulary()
+        self.areas = Vocabulary()
+        self.currencies = Vocabulary()
+        if stream:
+            self.vacancies_objects = []
+        else:
+            self.vacancies_objects = [self.create_vacancy(row) for row in vacancies_objects if is_valid_row(row)]
+        self.number_vacancies = len(self.vacancies_objects)
         self.statistic = []
 
+    def create_vacancy(self, row):
+        """Создает вакансию, строковые значения которой закодированы словарями набора данных.
+
+        Args:
+            row (list[str]): Строка файла
+
+        Returns:
+            Vacancy: Вакансия
+        """
+        return Vacancy(row, self.names, self.areas, self.currencies)
+
+    def get_vacancies(self):
+        """Возвращает итератор по вакансиям. В потоковом режиме строки читаются из файла и проверяются по одной,
+        поэтому в памяти находится только текущая вакансия.
+
+        Returns:
+            iterator[Vacancy]: Вакансии со всеми заполненными значениями
+        """
+        if self.stream:
+            return (self.create_vacancy(row) for row in read_rows(self.file_name) if is_valid_row(row))
+        return iter(self.vacancies_objects)
+
     def calculate_statistics(self, profession_name):
         """Вычисляет статистику по вакансиям: динамика уровня зарплат по годам, динамика количества вакансий по
         годам, динамика уровня зарплат по годам для выбранной профессии, динамика количества вакансий по годам для
@@ -92,25 +131,31 @@ class DataSet:
 
         salary_by_years = {}
         salary_by_years_profession = {}
-        sum_salary_by_city = {}
+        sum_salary_by_city = [0] * len(self.areas)
         salary_by_city = {}
         number_vac_by_years = {}
         number_profession_by_years = {}
-        number_vac_by_city = {}
+        number_vac_by_city = [0] * len(self.areas)
         percentage_vac_by_city = {}
-        for vacancy in self.vacancies_objects:
-            year = int(vacancy.published_at[0])
-            city = vacancy.area_name
+        number_vacancies = 0
+        for vacancy in self.get_vacancies():
+            year = vacancy.year
+            city = vacancy.area_code if vacancy.area_code is not None else self.areas.encode(vacancy.area_name)
+            salary = vacancy.salary.convert_to_rubles()
+            number_vacancies += 1
             number_vac_by_years[year] = number_vac_by_years.get(year, 0) + 1
-            salary_by_years[year] = salary_by_years.get(year, 0) + vacancy.salary.convert_to_rubles()
-            number_vac_by_city[city] = number_vac_by_city.get(city, 0) + 1
-            sum_salary_by_city[city] = sum_salary_by_city.get(city, 0) + vacancy.salary.convert_to_rubles()
+            salary_by_years[year] = salary_by_years.get(year, 0) + salary
+            if city >= len(number_vac_by_city):
+                number_vac_by_city.extend([0] * (city + 1 - len(number_vac_by_city)))
+                sum_salary_by_city.extend([0] * (city + 1 - len(sum_salary_by_city)))
+            number_vac_by_city[city] += 1
+            sum_salary_by_city[city] += salary
             salary_by_years_profession.setdefault(year, 0)
             number_profession_by_years.setdefault(year, 0)
             if profession_name in vacancy.name:
-                salary_by_years_profession[year] = salary_by_years_profession.get(year,
-                                                                                  0) + vacancy.salary.convert_to_rubles()
+                salary_by_years_profession[year] = salary_by_years_profession.get(year, 0) + salary
                 number_profession_by_years[year] = number_profession_by_years.get(year, 0) + 1
+        self.number_vacancies = number_vacancies
 
         for year in range(2007, 2023):
             if year in number_vac_by_years.keys():
@@ -128,11 +173,12 @@ class DataSet:
                 number_profession_by_years[year] = 0
                 salary_by_years_profession[year] = 0
 
-        for city in number_vac_by_city.keys():
-            proportion_vacancy = number_vac_by_city.get(city) / len(self.vacancies_objects)
+        for code, number_vac in enumerate(number_vac_by_city):
+            proportion_vacancy = number_vac / number_vacancies
             if proportion_vacancy >= 0.01:
+                city = self.areas[code]
                 percentage_vac_by_city[city] = round(proportion_vacancy, 4)
-                salary_by_city[city] = math.floor(sum_salary_by_city[city] / number_vac_by_city.get(city))
+                salary_by_city[city] = math.floor(sum_salary_by_city[code] / number_vac)
 
         sorted_salary_by_years = dict(sorted(salary_by_years.items(), key=lambda x: x[0]))
         sorted_number_vac_by_years = dict(sorted(number_vac_by_years.items(), key=lambda x: x[0]))
@@ -168,14 +214,22 @@ class Vacancy:
         name (str): Название профессии
         salary (Salary): Оклад
         area_name (): Название региона
-        published_at (): Дата публикации вакансии
+        area_code (int): Код региона в словаре регионов, None если словарь не задан; тогда DataSet кодирует
+            area_name своим словарем при подсчете статистики
+        published_at (): Дата публикации вакансии, разбирается на значения только при обращении
+        year (int): Год публикации вакансии
+        month (int): Месяц публикации вакансии
     """
 
-    def __init__(self, vacancy):
+    def __init__(self, vacancy, names=None, areas=None, currencies=None):
         """Устанавливает все необходимые атрибуты для объекта Vacancy.
 
-        Args: vacancy (list): Лист данных о вакансии состоящий из: название профессии, оклад, название региона, дата
-        публикации вакансии.
+        Args:
+            vacancy (list): Лист данных о вакансии состоящий из: название профессии, оклад, название региона, дата
+                публикации вакансии.
+            names (Vocabulary): Словарь названий вакансий, None - не кодировать
+            areas (Vocabulary): Словарь регионов, None - не кодировать
+            currencies (Vocabulary): Словарь валют оклада, None - не кодировать
 
         >>> type(Vacancy(['IT аналитик', '35000.0', '45000.0','RUR', 'Санкт-Петербург', '2007-12-03T17:34:36+0300'])).__name__
         'Vacancy'
@@ -196,11 +250,23 @@ class Vacancy:
         """
 
         self.name = vacancy[0].replace('\xa0', '\x20')
-        self.salary = Salary([vacancy[1], vacancy[2], vacancy[3]])
+        self.salary = Salary([vacancy[1], vacancy[2], vacancy[3]], currencies)
         self.area_name = vacancy[4]
-        self.published_at = self.parse_date_simple(vacancy[5])
-        # self.published_at = self.parse_date_regex(vacancy[5])
-        # self.published_at = self.parse_date_strptime(vacancy[5])
+        self.area_code = None
+        if names is not None:
+            self.name = names.intern(self.name)
+        if areas is not None:
+            self.area_code = areas.encode(self.area_name)
+            self.area_name = areas[self.area_code]
+        self.date = vacancy[5]
+        self.year, self.month = get_year_month(vacancy[5])
+
+    @property
+    def published_at(self):
+        """tuple[str]: Значения даты публикации: год, месяц, день, часы, минуты, секунды, часовой пояс"""
+        return self.parse_date_simple(self.date)
+        # return self.parse_date_regex(self.date)
+        # return self.parse_date_strptime(self.date)
 
     @staticmethod
     def parse_date_simple(date):
@@ -235,11 +301,12 @@ class Salary:
         salary_currency (str): Валюта оклада
     """
 
-    def __init__(self, salary):
+    def __init__(self, salary, currencies=None):
         """Инициализирует объект Salary.
 
         Args:
             salary (list): Информация об окладе: нижняя граница оклада, верхняя граница оклада, валюта оклада
+            currencies (Vocabulary): Словарь валют оклада, None - не кодировать
 
         >>> type(Salary(['123000.0', '987000.0','RUR'])).__name__
         'Salary'
@@ -259,7 +326,7 @@ class Salary:
 
         self.salary_from = int(float(salary[0]))
         self.salary_to = int(float(salary[1]))
-        self.salary_currency = salary[2]
+        self.salary_currency = salary[2] if currencies is None else currencies.intern(salary[2])
 
     def convert_to_rubles(self):
         """Вычисляет среднее значение зарплаты и конвертирует в рубли, при помощи словоря - currency_to_rub.
@@ -394,7 +461,8 @@ class Report:
 
 
 def csv_reader(file_name):
-    """Открывает и читает необходимый файл, а также возвращяет полученный результат.
+    """Открывает и читает необходимый файл, а также возвращяет полученный результат. Если для файла есть актуальный
+    снимок (snapshot.write_snapshot), строки берутся из него без разбора csv.
 
     Args:
        file_name (str): Название файла для чтения
@@ -431,6 +499,9 @@ def csv_reader(file_name):
     >>> csv_reader('unittest.csv')[0].vacancies_objects[0].salary.salary_currency
     'KGS'
     """
+    reader, list_naming = read_snapshot_rows(file_name)
+    if list_naming is not None:
+        return DataSet(file_name, reader), list_naming
 
     with open(file_name, encoding="utf-8-sig") as file:
         reader = list(csv.reader(file))
@@ -443,6 +514,53 @@ def csv_reader(file_name):
         return data_set, list_naming
 
 
+def is_valid_row(row):
+    """Проверяет, что в строке файла заполнены все значения.
+
+    Args:
+        row (list[str]): Строка файла
+
+    Returns:
+        bool: True, если пустых значений нет
+
+    >>> is_valid_row(['IT аналитик', '35000.0', '45000.0','RUR', 'Санкт-Петербург', '2007-12-03T17:34:36+0300'])
+    True
+    >>> is_valid_row(['IT аналитик', '', '45000.0','RUR', 'Санкт-Петербург', '2007-12-03T17:34:36+0300'])
+    False
+    """
+    return None not in row and '' not in row
+
+
+def read_rows(file_name):
+    """Построчно читает файл, пропуская строчку с названиями столбцов. Файл не загружается в память целиком.
+
+    Args:
+       file_name (str): Название файла для чтения
+
+    Yields:
+        list[str]: Очередная строка файла
+    """
+    with open(file_name, encoding="utf-8-sig") as file:
+        reader = csv.reader(file)
+        next(reader, None)
+        yield from reader
+
+
+def csv_reader_stream(file_name):
+    """Открывает файл в потоковом режиме: читается только строчка с названиями столбцов, а вакансии обрабатываются
+    по одной при подсчете статистики, поэтому расход памяти не зависит от размера файла.
+
+    Args:
+       file_name (str): Название файла для чтения
+
+    Returns:
+        DataSet, list: Потоковый набор данных, строчка с названиями столбцов
+    """
+    with open(file_name, encoding="utf-8-sig") as file:
+        list_naming = next(csv.reader(file), None)
+    return DataSet(file_name, None, stream=True), list_naming
+
+
 def main():
     name_file = input('Введите название файла: ')
     profession_name = input('Введите название профессии: ')
@@ -461,21 +579,26 @@ def main():
         report.generate_image(statistic)
 
 
-def get_graph_statistics(name_file, profession_name, titles):
+def get_graph_statistics(name_file, profession_name, titles, stream=False):
     """Метод запускающий программу.
 
     Args:
        name_file (str): Название файла
        profession_name (str): Название профессии
        titles (list[str]): Названия графиков
+       stream (bool): Читать файл в потоковом режиме, не загружая его в память целиком
     """
-    data_set, list_naming = csv_reader(name_file)
+    if stream:
+        data_set, list_naming = csv_reader_stream(name_file)
+    else:
+        data_set, list_naming = csv_reader(name_file)
     if list_naming is None:
         print('Пустой файл')
-    elif len(data_set.vacancies_objects) == 0:
+        return
+    statistic = data_set.calculate_statistics(profession_name)
+    if data_set.number_vacancies == 0:
         print('Нет данных')
     else:
-        statistic = data_set.calculate_statistics(profession_name)
         legends = [['средняя з/п', f'з/п {profession_name.lower()}'],
                    ['Количество вакансий', f'Количество ваканси\n{profession_name.lower()}']]
         report = Report(titles, legends)
@@ -0,0 +1,208 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+STORED_HEADERS = ('etag', 'last-modified', 'content-type')
+
+
+def immutable_after(param, date_format, days=1, ttl=0):
+    """Создает правило срока хранения: ответ на запрос, дата в параметре которого старше days дней, больше не
+    меняется и хранится бессрочно, остальные ответы считаются свежими ttl секунд.
+
+    Args:
+        param (str): Название параметра запроса с датой
+        date_format (str): Формат даты в параметре
+        days (int): Через сколько дней после даты ответ перестает меняться
+        ttl (float): Сколько секунд считать свежим ответ на остальные запросы
+
+    Returns:
+        callable: Функция, которая по параметрам запроса возвращает срок свежести в секундах, None - бессрочно
+
+    >>> rule = immutable_after('date_req', '%d/%m/%Y', ttl=60)
+    >>> rule({'date_req': '01/12/2007'}), rule({'date_req': datetime.now().strftime('%d/%m/%Y')}), rule({})
+    (None, 60, 60)
+    """
+    def get_ttl(params):
+        try:
+            date = datetime.strptime(params[param], date_format)
+        except (KeyError, ValueError):
+            return ttl
+        return None if datetime.now() - date > timedelta(days=days) else ttl
+    return get_ttl
+
+
+class CachedSession:
+    """Кэш ответов HTTP на диске поверх requests.Session. Ответы хранятся по адресу с параметрами запроса: тело
+    сжато gzip, рядом лежат статус, заголовки и срок свежести. Свежий ответ возвращается без обращения к сети;
+    устаревший перепроверяется условным запросом (If-None-Match, If-Modified-Since), и если сервер ответил 304,
+    тело повторно не загружается.
+
+    Attributes:
+        session (requests.Session): Сессия для запросов
+        cache_dir (str): Директория кэша
+        get_ttl (callable): Правило срока свежести по параметрам запроса, None - бессрочно
+        lock (threading.Lock): Блокировка счетчиков
+        hits (int): Сколько ответов взято из кэша без запроса
+        revalidated (int): Сколько ответов подтверждено сервером без загрузки тела
+        fetched (int): Сколько ответов загружено
+    """
+
+    def __init__(self, session, cache_dir, get_ttl=None):
+        """Инициализирует кэш.
+
+        Args:
+            session (requests.Session): Сессия для запросов
+            cache_dir (str): Директория кэша
+            get_ttl (callable): Правило срока свежести, None - ответы всегда перепроверяются
+        """
+        self.session = session
+        self.cache_dir = cache_dir
+        self.get_ttl = get_ttl if get_ttl is not None else lambda params: 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.fetched = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Закрывает сессию."""
+        self.session.close()
+
+    def count(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get_path(self, url):
+        """Возвращает путь к записи кэша без расширения.
+
+        Args:
+            url (str): Адрес запроса с параметрами
+
+        Returns:
+            str: Путь к записи
+        """
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def load(self, path):
+        """Читает описание записи кэша.
+
+        Args:
+            path (str): Путь к записи
+
+        Returns:
+            dict: Описание записи, None если ее нет
+        """
+        try:
+            with open(f'{path}.json', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, path, entry, body=None):
+        """Атомарно записывает тело и описание записи кэша. Тело записывается первым, поэтому описание никогда не
+        ссылается на недописанное тело.
+
+        Args:
+            path (str): Путь к записи
+            entry (dict): Описание записи
+            body (bytes): Тело ответа, None - не менять сохраненное тело
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        suffix = f'{os.getpid()}.{threading.get_ident()}.tmp'
+        if body is not None:
+            with gzip.open(f'{path}.gz.{suffix}', 'wb') as file:
+                file.write(body)
+            os.replace(f'{path}.gz.{suffix}', f'{path}.gz')
+        with open(f'{path}.json.{suffix}', 'w', encoding='utf-8') as file:
+            json.dump(entry, file, ensure_ascii=False)
+        os.replace(f'{path}.json.{suffix}', f'{path}.json')
+
+    def make_response(self, path, entry):
+        """Восстанавливает ответ из записи кэша.
+
+        Args:
+            path (str): Путь к записи
+            entry (dict): Описание записи
+
+        Returns:
+            requests.Response: Ответ
+        """
+        response = requests.Response()
+        with gzip.open(f'{path}.gz', 'rb') as file:
+            response._content = file.read()
+        response.status_code = entry['status']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = entry['encoding']
+        response.url = entry['url']
+        return response
+
+    def get(self, url, params=None, **kwargs):
+        """Выполняет GET запрос через кэш. Сохраняются только успешные ответы. Если тело записи пропало, запрос
+        выполняется без условных заголовков, а если оно пропало уже после ответа 304 - повторяется без них.
+
+        Args:
+            url (str): Адрес
+            params (dict): Параметры запроса
+
+        Returns:
+            requests.Response: Ответ
+        """
+        url = requests.Request('GET', url, params=params).prepare().url
+        path = self.get_path(url)
+        entry = self.load(path)
+        now = time.time()
+        if entry is not None and (entry['expires'] is None or now < entry['expires']):
+            try:
+                response = self.make_response(path, entry)
+            except OSError:
+                entry = None
+            else:
+                self.count('hits')
+                return response
+        headers = dict(kwargs.pop('headers', None) or {})
+        if entry is not None and not os.path.exists(f'{path}.gz'):
+            entry = None
+        if entry is not None:
+            validators = CaseInsensitiveDict(entry['headers'])
+            if validators.get('ETag'):
+                headers['If-None-Match'] = validators['ETag']
+            if validators.get('Last-Modified'):
+                headers['If-Modified-Since'] = validators['Last-Modified']
+        response = self.session.get(url, headers=headers, **kwargs)
+        ttl = self.get_ttl({key: values[0] for key, values in parse_qs(urlparse(url).query).items()})
+        expires = None if ttl is None else now + ttl
+        if entry is not None and response.status_code == 304:
+            entry['expires'] = expires
+            try:
+                cached = self.make_response(path, entry)
+            except OSError:
+                headers.pop('If-None-Match', None)
+                headers.pop('If-Modified-Since', None)
+                response = self.session.get(url, headers=headers, **kwargs)
+            else:
+                self.save(path, entry)
+                self.count('revalidated')
+                return cached
+        if response.status_code == 200:
+            self.save(path, {'url': url, 'status': response.status_code, 'encoding': response.encoding,
+                             'headers': {key: value for key, value in response.headers.items()
+                                         if key.lower() in STORED_HEADERS},
+                             'expires': expires}, response.content)
+        self.count('fetched')
+        return response
@@ -1,9 +1,10 @@
-from multiprocessing import Pool
-import concurrent.futures as pool
+from functools import partial
 import math
 import os
 import csv
 
+from executor import run_tasks
+
 
 currency_to_rub = {"AZN": 35.68,
                    "BYR": 23.91,
@@ -195,18 +196,14 @@ def print_statistic(statistic_year):
     print(f'Динамика количества вакансий по годам для выбранной профессии: {number_profession_by_years}')
 
 
-def main():
+def main(backend='auto'):
     # name_file = input('Введите название файла: ')
     name_file = 'years'
     # profession_name = input('Введите название профессии: ')
     profession_name = 'Аналитик'
     files = [os.getcwd() + f'\\{name_file}\\' + file for file in os.listdir(os.getcwd() + f'\\{name_file}\\')]
-    tuples_files_profession = [(file, profession_name) for file in files]
-    with Pool(8) as p:
-        statistic_year = p.starmap(get_statistic, tuples_files_profession)
-    # with pool.ProcessPoolExecutor(max_workers=8) as executor:
-    #     statistic_year = executor.map(get_statistic, files, [profession_name for i in range(0, len(files))])
-    print_statistic(statistic_year)
+    statistic_year = run_tasks(partial(get_statistic, profession_name=profession_name), files, backend)
+    print_statistic(sorted((stat for stat in statistic_year if stat is not None), key=lambda stat: stat[0]))
 
 
 if __name__ == '__main__':
@@ -1,8 +1,16 @@
-from multiprocessing import Pool
+from functools import partial
 import math
 import os
 import csv
 
+from aggregates import merge_aggregates
+from date_parsing import get_year_month
+from executor import run_tasks
+from partition_manifest import plan_partitions
+from partitioning import parse_filters
+from snapshot import read_snapshot_rows
+from vacancy_table import csv_reader_table
+
 
 currency_to_rub = {"AZN": 35.68,
                    "BYR": 23.91,
@@ -77,7 +85,8 @@ class Vacancy:
             name (str): Название профессии
             salary (Salary): Оклад
             area_name (): Название региона
-            published_at (): Дата публикации вакансии
+            published_at (): Дата публикации вакансии, разбирается на значения только при обращении
+            year (int): Год публикации вакансии
     """
 
     def __init__(self, vacancy):
@@ -90,7 +99,13 @@ class Vacancy:
         self.name = vacancy[0].replace('\xa0', '\x20')
         self.salary = Salary([vacancy[1], vacancy[2], vacancy[3]])
         self.area_name = vacancy[4]
-        self.published_at = self.parse_date_simple(vacancy[5])
+        self.date = vacancy[5]
+        self.year = get_year_month(vacancy[5])[0]
+
+    @property
+    def published_at(self):
+        """tuple[str]: Значения даты публикации: год, месяц, день, часы, минуты, секунды, часовой пояс"""
+        return self.parse_date_simple(self.date)
 
     @staticmethod
     def parse_date_simple(date):
@@ -135,7 +150,8 @@ class Salary:
 
 
 def csv_reader(file_name):
-    """Открывает и читает необходимый файл, а также возвращяет полученный результат.
+    """Открывает и читает необходимый файл, а также возвращяет полученный результат. Если для файла есть
+    актуальный снимок (snapshot.write_snapshot), строки берутся из него без разбора csv.
 
         Args:
            file_name (str): Название файла для чтения
@@ -143,6 +159,10 @@ def csv_reader(file_name):
         Returns:
             DataSet, list: Полученные данные из прочитанного файла, строчка с названиями столбцов
     """
+    reader, list_naming = read_snapshot_rows(file_name)
+    if list_naming is not None:
+        return DataSet(file_name, reader), list_naming
+
     with open(file_name, encoding="utf-8-sig") as file:
         reader = list(csv.reader(file))
         try:
@@ -154,22 +174,23 @@ def csv_reader(file_name):
         return data_set, list_naming
 
 
-def get_statistic(file_name, profession_name):
+def get_statistic(file_name, profession_name, filters=()):
     """Получает данные из файла, вычисляет статистику и возвращяет её.
 
         Args:
             file_name (str): Название файла с данными для сбора статистики
             profession_name (str): Название профессии для сбора статистики по профессии
+            filters (list[tuple]): Условия фильтрации строк
         Returns:
-            list: Вычисленная статистика
+            VacancyAggregate: Частичная статистика по годам; статистики разделов одного года складываются
     """
-    data_set, list_naming = csv_reader(file_name)
+    table, list_naming = csv_reader_table(file_name, filters)
     if list_naming is None:
         print('Пустой файл')
-    elif len(data_set.vacancies_objects) == 0:
+    elif len(table) == 0:
         print('Нет данных')
     else:
-        return data_set.calculate_year_statistics(profession_name)
+        return table.get_aggregate(profession_name)
 
 
 def print_statistic(statistic_year):
@@ -194,13 +215,15 @@ def print_statistic(statistic_year):
     print(f'Динамика количества вакансий по годам для выбранной профессии: {number_profession_by_years}')
 
 
-def main():
+def main(filters=(), backend='auto'):
     name_file = input('Введите название файла: ')
     profession_name = input('Введите название профессии: ')
-    tuples_files_profession = [(os.getcwd() + f'\\{name_file}\\' + file, profession_name) for file in os.listdir(os.getcwd() + f'\\{name_file}\\')]
-    with Pool(16) as p:
-        statistic_year = p.starmap(get_statistic, tuples_files_profession)
-    print_statistic(statistic_year)
+    filters = parse_filters(filters)
+    files = plan_partitions(os.path.join(os.getcwd(), name_file), filters)
+    statistic_year = run_tasks(partial(get_statistic, profession_name=profession_name, filters=filters), files,
+                               backend)
+    aggregate = merge_aggregates(stat for stat in statistic_year if stat is not None)
+    print_statistic([[str(stat[0])] + stat[1:] for stat in aggregate.get_year_statistics()])
 
 
 if __name__ == '__main__':
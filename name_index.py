@@ -0,0 +1,155 @@
+from array import array
+
+import numpy as np
+
+
+def normalize_name(name):
+    """Приводит название вакансии к виду, по которому строится индекс: нижний регистр, обычные пробелы вместо
+    неразрывных.
+
+    Args:
+        name (str): Название вакансии
+
+    Returns:
+        str: Нормализованное название
+
+    >>> normalize_name('Ведущий\\xa0Аналитик')
+    'ведущий аналитик'
+    """
+    return name.replace('\xa0', '\x20').lower()
+
+
+def get_trigrams(text):
+    """Возвращает множество триграмм строки.
+
+    Args:
+        text (str): Строка
+
+    Returns:
+        set[str]: Триграммы
+
+    >>> sorted(get_trigrams('аналитик'))
+    ['али', 'ана', 'ити', 'лит', 'нал', 'тик']
+    """
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class NameIndex:
+    """Инвертированный индекс триграмм по названиям вакансий. Одинаковые названия хранятся один раз, а запрос
+    профессии проверяет только названия, в которых есть все триграммы запроса, вместо просмотра всех строк.
+
+    Attributes:
+        names (list[str]): Различные названия вакансий
+        name_ids (np.ndarray): Номер названия в names для каждой строки данных
+        postings (dict[str: np.ndarray]): Номера названий, в которых встречается триграмма
+        name_cache (dict[tuple[str, bool]: np.ndarray]): Запомненные маски названий по запросам
+        cache (dict[tuple[str, bool]: np.ndarray]): Запомненные маски строк по запросам
+    """
+
+    def __init__(self, names):
+        """Строит индекс по названиям вакансий.
+
+        Args:
+            names (iterable[str]): Названия вакансий в порядке строк данных
+
+        >>> NameIndex(['IT аналитик', 'Инженер', 'Системный Аналитик', 'IT аналитик']).get_mask('аналитик')
+        array([ True, False, False,  True])
+        """
+        ids = {}
+        name_ids = array('I')
+        self.names = []
+        postings = {}
+        for name in names:
+            name_id = ids.get(name)
+            if name_id is None:
+                name_id = ids[name] = len(self.names)
+                self.names.append(name)
+                for trigram in get_trigrams(normalize_name(name)):
+                    postings.setdefault(trigram, array('I')).append(name_id)
+            name_ids.append(name_id)
+        self.name_ids = np.frombuffer(name_ids, dtype=np.uint32)
+        self.postings = {trigram: np.frombuffer(ids, dtype=np.uint32) for trigram, ids in postings.items()}
+        self.name_cache = {}
+        self.cache = {}
+
+    def __len__(self):
+        return len(self.name_ids)
+
+    def get_candidates(self, profession_name):
+        """Находит номера названий, которые содержат все триграммы запроса и поэтому могут содержать запрос.
+
+        Args:
+            profession_name (str): Название профессии
+
+        Returns:
+            np.ndarray: Номера названий-кандидатов
+        """
+        trigrams = get_trigrams(normalize_name(profession_name))
+        if not trigrams:
+            return np.arange(len(self.names), dtype=np.uint32)
+        lists = sorted((self.postings.get(trigram, np.empty(0, dtype=np.uint32)) for trigram in trigrams), key=len)
+        candidates = lists[0]
+        for ids in lists[1:]:
+            if len(candidates) == 0:
+                break
+            candidates = np.intersect1d(candidates, ids, assume_unique=True)
+        return candidates
+
+    def search(self, profession_name, ignore_case=False):
+        """Находит названия вакансий, в которых встречается название профессии.
+
+        Args:
+            profession_name (str): Название профессии
+            ignore_case (bool): Не учитывать регистр; иначе результат совпадает с "profession_name in name"
+
+        Returns:
+            np.ndarray: Номера подходящих названий в names
+        """
+        if ignore_case:
+            query = normalize_name(profession_name)
+            matches = [name_id for name_id in self.get_candidates(profession_name).tolist()
+                       if query in normalize_name(self.names[name_id])]
+        else:
+            matches = [name_id for name_id in self.get_candidates(profession_name).tolist()
+                       if profession_name in self.names[name_id]]
+        return np.array(matches, dtype=np.uint32)
+
+    def get_name_mask(self, profession_name, ignore_case=False):
+        """Отмечает различные названия, в которых встречается название профессии. Результаты запросов
+        запоминаются.
+
+        Args:
+            profession_name (str): Название профессии
+            ignore_case (bool): Не учитывать регистр
+
+        Returns:
+            np.ndarray: Маска подходящих названий из names
+
+        >>> NameIndex(['IT аналитик', 'Инженер', 'IT аналитик']).get_name_mask('аналитик')
+        array([ True, False])
+        """
+        key = (profession_name, ignore_case)
+        mask = self.name_cache.get(key)
+        if mask is None:
+            mask = self.name_cache[key] = np.zeros(len(self.names), dtype=bool)
+            mask[self.search(profession_name, ignore_case)] = True
+            mask.flags.writeable = False
+        return mask
+
+    def get_mask(self, profession_name, ignore_case=False):
+        """Отмечает строки данных, в названии которых встречается название профессии. Результаты запросов
+        запоминаются.
+
+        Args:
+            profession_name (str): Название профессии
+            ignore_case (bool): Не учитывать регистр
+
+        Returns:
+            np.ndarray: Маска подходящих строк
+        """
+        key = (profession_name, ignore_case)
+        mask = self.cache.get(key)
+        if mask is None:
+            mask = self.cache[key] = self.get_name_mask(profession_name, ignore_case)[self.name_ids]
+            mask.flags.writeable = False
+        return mask
@@ -1,38 +1,538 @@
+import csv
+import os
+import shutil
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import requests
-import pandas as pd
-from datetime import datetime
+from requests.adapters import HTTPAdapter
+from datetime import datetime, time, timedelta
 import json
+import re
+import threading
+from time import monotonic, sleep
+import numpy as np
 
+from http_cache import CachedSession, immutable_after
+from seen_ids import SeenIds
 
-def get_request(day=datetime.today().day):
-    date = datetime(datetime.today().year, datetime.today().month, day).date()
-    all_vacancies = pd.DataFrame()
-    for hour in range(0, 23):
-        for page in range(20):
-            res = get_page(date, hour, page)
-            if res.status_code != 200:
+HH_URL = 'https://api.hh.ru/vacancies'
+COLUMNS = ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at']
+PER_PAGE = 100
+MAX_PAGES = 20
+RESULTS_LIMIT = PER_PAGE * MAX_PAGES
+DAY_SECONDS = 24 * 60 * 60
+RATE_LIMIT = 10
+TIMEOUT = (5, 30)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_AFTER_STATUSES = (429, 503)
+MAX_BACKOFF = 120
+SEEN_FILE = 'seen_vacancies.bin'
+CACHE_DIR = 'hh_cache'
+IMMUTABLE_DAYS = 7
+PART_PATTERN = re.compile(r'^(\d{5})-(\d{5})\.csv$')
+
+
+class RateLimiter:
+    """Ограничитель частоты запросов по алгоритму маркерной корзины, общий для всех потоков.
+
+    Attributes:
+        rate (float): Допустимое количество запросов в секунду
+        burst (int): Сколько запросов можно сделать подряд без ожидания
+        tokens (float): Доступные сейчас запросы
+        updated (float): Время последнего пополнения корзины
+        lock (threading.Lock): Блокировка для одновременной работы нескольких потоков
+    """
+
+    def __init__(self, rate, burst=1):
+        """Инициализирует ограничитель с полной корзиной.
+
+        Args:
+            rate (float): Допустимое количество запросов в секунду
+            burst (int): Сколько запросов можно сделать подряд без ожидания
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Ждет, пока очередной запрос не превысит допустимую частоту."""
+        with self.lock:
+            now = monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0
+        if delay:
+            sleep(delay)
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTPAdapter, который повторяет запросы, завершившиеся ошибкой соединения, ошибкой сервера или превышением
+    лимита запросов, с нарастающей задержкой (для 429 и 503 - не меньше Retry-After), и перед каждой попыткой, в
+    том числе повторной, ждет разрешения ограничителя частоты. Повторы urllib3 (max_retries) выполняются внутри
+    отправки и мимо ограничителя, поэтому они отключены.
+
+    Attributes:
+        limiter (RateLimiter): Ограничитель частоты, None - без ограничения
+        retries (int): Количество повторов запроса
+        backoff_factor (float): Задержка перед первым повтором в секундах, перед каждым следующим - вдвое больше
+    """
+
+    def __init__(self, limiter=None, retries=3, backoff_factor=0.5, **kwargs):
+        self.limiter = limiter
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        super().__init__(max_retries=0, **kwargs)
+
+    def get_delay(self, attempt, response=None):
+        """Вычисляет задержку перед повтором.
+
+        Args:
+            attempt (int): Номер повтора, начиная с 0
+            response (requests.Response): Ответ, после которого запрос повторяется, None - ошибка соединения
+
+        Returns:
+            float: Задержка в секундах
+
+        >>> response = requests.Response()
+        >>> response.status_code, response.headers['Retry-After'] = 429, '3'
+        >>> adapter = RateLimitedAdapter()
+        >>> adapter.get_delay(2), adapter.get_delay(0, response)
+        (2.0, 3.0)
+        """
+        delay = min(self.backoff_factor * 2 ** attempt, MAX_BACKOFF)
+        if response is not None and response.status_code in RETRY_AFTER_STATUSES:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+        return delay
+
+    def send(self, request, **kwargs):
+        for attempt in range(self.retries + 1):
+            if self.limiter is not None:
+                self.limiter.acquire()
+            try:
+                response = super().send(request, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+                sleep(self.get_delay(attempt))
                 continue
-            date_json = json.loads(res.text)['items']
-            df = pd.DataFrame([{'name': safe_get(vacancy, 'name'),
-                                'salary_from': safe_get(vacancy, 'salary', 'from'),
-                                'salary_to': safe_get(vacancy, 'salary', 'to'),
-                                'salary_currency': safe_get(vacancy, 'salary', 'currency'),
-                                'area_name': safe_get(vacancy, 'area', 'name'),
-                                'published_at': safe_get(vacancy, 'published_at')}
-                               for vacancy in date_json])
-            all_vacancies = pd.concat([all_vacancies, df], ignore_index=True)
-    return all_vacancies, date
-
-
-def get_page(date, hour, page):
+            if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                return response
+            delay = self.get_delay(attempt, response)
+            response.close()
+            sleep(delay)
+
+
+def create_session(max_workers, retries=3, rate_limit=None, cache_dir=None):
+    """Создает сессию с пулом соединений на max_workers одновременных запросов. Запросы, завершившиеся ошибкой
+    сервера или превышением лимита запросов, повторяются с нарастающей задержкой; каждая попытка проходит через
+    ограничитель частоты. Если задана директория кэша,
+    ответы сохраняются на диск: интервалы, закончившиеся больше IMMUTABLE_DAYS дней назад, повторно не
+    запрашиваются, а остальные перепроверяются условным запросом.
+
+    Args:
+        max_workers (int): Максимальное количество одновременных запросов
+        retries (int): Количество повторов запроса
+        rate_limit (float): Общее для сессии ограничение количества запросов в секунду, None - без ограничения
+        cache_dir (str): Директория кэша ответов, None - не использовать кэш
+
+    Returns:
+        requests.Session or CachedSession: Сессия
+    """
+    session = requests.Session()
+    limiter = None if rate_limit is None else RateLimiter(rate_limit)
+    adapter = RateLimitedAdapter(limiter, retries, pool_connections=1, pool_maxsize=max_workers)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if cache_dir is not None:
+        return CachedSession(session, cache_dir, immutable_after('date_to', '%Y-%m-%dT%H:%M:%S', IMMUTABLE_DAYS))
+    return session
+
+
+def crawl_days(first_date, last_date, max_days=4, max_workers=8, rate_limit=RATE_LIMIT, path='.', base_url=HH_URL,
+               seen_file=SEEN_FILE, cache_dir=CACHE_DIR):
+    """Собирает вакансии за каждый день диапазона дат. Дни собираются параллельно через одну сессию с общим
+    ограничением частоты запросов, а уже собранные дни пропускаются. Вакансия, идентификатор которой уже записан
+    за любой из дней, в том числе при прошлых запусках, повторно не записывается.
+
+    Args:
+        first_date (datetime.date): Первая дата
+        last_date (datetime.date): Последняя дата включительно
+        max_days (int): Сколько дней собирать одновременно
+        max_workers (int): Максимальное количество одновременных запросов одного дня
+        rate_limit (float): Ограничение количества запросов в секунду на все дни
+        path (str): Директория для файлов вакансий
+        base_url (str): Адрес API вакансий
+        seen_file (str): Файл записанных идентификаторов вакансий в директории path
+        cache_dir (str): Директория кэша ответов в директории path, None - не использовать кэш
+
+    Returns:
+        dict[datetime.date: str]: Пути к файлам вакансий по датам, None для дней, собранных не полностью
+    """
+    dates = [first_date + timedelta(days=i) for i in range((last_date - first_date).days + 1)]
+    dates = [date for date in dates if not os.path.exists(get_day_file_name(path, date))]
+    seen = SeenIds(os.path.join(path, seen_file))
+    session = create_session(max_days * max_workers, rate_limit=rate_limit,
+                             cache_dir=None if cache_dir is None else os.path.join(path, cache_dir))
+    try:
+        with ThreadPoolExecutor(max_workers=max_days) as executor:
+            files = executor.map(lambda date: crawl_day(date, max_workers, path, base_url, session, seen), dates)
+            return dict(zip(dates, files))
+    finally:
+        session.close()
+        seen.close()
+
+
+def get_day_file_name(path, date):
+    """Возвращает путь к файлу вакансий за день.
+
+    Args:
+        path (str): Директория для файлов вакансий
+        date (datetime.date): Дата
+
+    Returns:
+        str: Путь к файлу
+    """
+    return os.path.join(path, f'vacancies_for_{date}.csv')
+
+
+def crawl_day(date, max_workers=8, path='.', base_url=HH_URL, session=None, seen=None):
+    """Собирает вакансии за сутки. Сутки делятся на интервалы адаптивно: интервал, в котором API находит больше
+    вакансий, чем можно получить постранично, делится на части, а спокойные часы не дробятся, поэтому запросов
+    почти столько, сколько страниц с вакансиями. Интервалы запрашиваются параллельно через общую сессию с пулом
+    соединений. Каждый собранный интервал сразу сохраняется в директорию контрольных точек, поэтому прерванный
+    сбор при повторном запуске запрашивает только не покрытое ими время. Когда собраны все интервалы, они
+    объединяются в файл "vacancies_for_<дата>.csv", а контрольные точки удаляются.
+
+    Args:
+        date (datetime.date): Дата
+        max_workers (int): Максимальное количество одновременных запросов
+        path (str): Директория для файла вакансий
+        base_url (str): Адрес API вакансий
+        session (requests.Session or CachedSession): Сессия для запросов, None - создать новую с кэшем ответов
+        seen (SeenIds): Записанные идентификаторы вакансий, None - не проверять повторы
+
+    Returns:
+        str: Путь к файлу вакансий, None если какие-то интервалы собрать не удалось
+    """
+    file_name = get_day_file_name(path, date)
+    checkpoint_dir = f'{file_name}.parts'
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    if seen is not None:
+        for window in get_done_windows(checkpoint_dir):
+            seen.commit(np.load(get_ids_name(get_part_name(checkpoint_dir, window))).tolist())
+    own_session = session is None
+    if own_session:
+        session = create_session(max_workers, cache_dir=os.path.join(path, CACHE_DIR))
+    failed = []
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(crawl_window, session, base_url, date, window, checkpoint_dir, seen): window
+                       for window in get_missing_windows(checkpoint_dir)}
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    window = futures.pop(future)
+                    try:
+                        parts = future.result()
+                    except requests.RequestException as error:
+                        failed.append(window)
+                        print(f'Не удалось собрать вакансии за {date} {format_window(window)}: {error}')
+                        continue
+                    for part in parts:
+                        futures[executor.submit(crawl_window, session, base_url, date, part, checkpoint_dir,
+                                                 seen)] = part
+    finally:
+        if own_session:
+            session.close()
+    if failed:
+        return None
+    merge_parts(checkpoint_dir, file_name)
+    shutil.rmtree(checkpoint_dir)
+    return file_name
+
+
+def format_window(window):
+    """Записывает интервал в виде времени начала и конца.
+
+    Args:
+        window (tuple[int, int]): Начало и конец интервала в секундах от начала суток
+
+    Returns:
+        str: Интервал
+
+    >>> format_window((0, 5400))
+    '00:00:00-01:30:00'
+    """
+    return '-'.join(f'{seconds // 3600:02}:{seconds // 60 % 60:02}:{seconds % 60:02}' for seconds in window)
+
+
+def get_part_name(checkpoint_dir, window):
+    """Возвращает путь к контрольной точке интервала.
+
+    Args:
+        checkpoint_dir (str): Директория контрольных точек
+        window (tuple[int, int]): Начало и конец интервала в секундах от начала суток
+
+    Returns:
+        str: Путь к файлу контрольной точки
+    """
+    return os.path.join(checkpoint_dir, f'{window[0]:05}-{window[1]:05}.csv')
+
+
+def get_ids_name(file_name):
+    """Возвращает путь к файлу идентификаторов вакансий, записанных в файл контрольной точки.
+
+    Args:
+        file_name (str): Путь к файлу контрольной точки
+
+    Returns:
+        str: Путь к файлу идентификаторов
+    """
+    return f'{file_name}.ids.npy'
+
+
+def get_done_windows(checkpoint_dir):
+    """Находит интервалы, для которых уже есть контрольные точки.
+
+    Args:
+        checkpoint_dir (str): Директория контрольных точек
+
+    Returns:
+        list[tuple[int, int]]: Собранные интервалы по возрастанию начала
+    """
+    windows = []
+    for name in os.listdir(checkpoint_dir):
+        match = PART_PATTERN.match(name)
+        if match is not None:
+            windows.append((int(match.group(1)), int(match.group(2))))
+    return sorted(windows)
+
+
+def get_missing_windows(checkpoint_dir):
+    """Находит промежутки суток, не покрытые контрольными точками. Соседние несобранные участки образуют один
+    интервал, а делить его при необходимости будет crawl_window.
+
+    Args:
+        checkpoint_dir (str): Директория контрольных точек
+
+    Returns:
+        list[tuple[int, int]]: Несобранные интервалы в секундах от начала суток
+    """
+    windows = []
+    start = 0
+    for done_start, done_end in get_done_windows(checkpoint_dir):
+        if done_start > start:
+            windows.append((start, done_start))
+        start = max(start, done_end)
+    if start < DAY_SECONDS:
+        windows.append((start, DAY_SECONDS))
+    return windows
+
+
+def split_window(window, found, limit=RESULTS_LIMIT):
+    """Делит интервал на равные части так, чтобы при равномерной публикации в каждой части было не больше limit
+    вакансий; интервал, в котором вакансий немного больше limit, делится пополам. Если вакансии распределены
+    неравномерно, переполненная часть будет снова поделена.
+
+    Args:
+        window (tuple[int, int]): Начало и конец интервала в секундах от начала суток
+        found (int): Количество вакансий в интервале по данным API
+        limit (int): Сколько вакансий можно получить постранично из одного интервала
+
+    Returns:
+        list[tuple[int, int]]: Части интервала
+
+    >>> split_window((0, 3600), 2500)
+    [(0, 1800), (1800, 3600)]
+    >>> split_window((0, 86400), 9000)
+    [(0, 17280), (17280, 34560), (34560, 51840), (51840, 69120), (69120, 86400)]
+    """
+    start, end = window
+    number = min(max(2, -(-found // limit)), end - start)
+    bounds = [start + (end - start) * i // number for i in range(number + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def crawl_window(session, base_url, date, window, checkpoint_dir, seen=None):
+    """Собирает вакансии интервала в контрольную точку. Первая страница показывает, сколько вакансий в интервале:
+    если больше, чем можно получить постранично, интервал делится на части, которые нужно собрать отдельно. Иначе
+    страницы запрашиваются, пока не закончатся страницы, о которых сообщил API, и сразу дописываются в файл,
+    поэтому память не растет с количеством страниц.
+
+    Args:
+        session (requests.Session): Сессия с пулом соединений
+        base_url (str): Адрес API вакансий
+        date (datetime.date): Дата
+        window (tuple[int, int]): Начало и конец интервала в секундах от начала суток
+        checkpoint_dir (str): Директория контрольных точек
+        seen (SeenIds): Записанные идентификаторы вакансий, None - не проверять повторы
+
+    Returns:
+        list[tuple[int, int]]: Части интервала, которые нужно собрать; пустой список, если интервал собран
+    """
+    res = get_page(date, window, 0, session, base_url)
+    res.raise_for_status()
+    data = json.loads(res.text)
+    found = data.get('found', 0)
+    if found > RESULTS_LIMIT:
+        if window[1] - window[0] > 1:
+            return split_window(window, found)
+        print(f'За {date} {format_window(window)} будут собраны только первые {RESULTS_LIMIT} из {found} вакансий')
+    pages = data.get('pages', 0)
+    with VacancyWriter(get_part_name(checkpoint_dir, window), seen=seen) as writer:
+        writer.write_page(data['items'])
+        for page in range(1, min(pages, MAX_PAGES)):
+            res = get_page(date, window, page, session, base_url)
+            res.raise_for_status()
+            writer.write_page(json.loads(res.text)['items'])
+    return []
+
+
+class VacancyWriter:
+    """Потоковая запись вакансий в csv файл: каждая полученная страница сразу дописывается в буферизованный файл,
+    поэтому в памяти находится только текущая страница. Строки пишутся во временный файл, который заменяет итоговый
+    только после успешного завершения, поэтому недописанный файл никогда не принимается за готовый.
+
+    Если задано множество записанных идентификаторов, вакансии, которые уже записаны или записываются в другой
+    файл, пропускаются. Идентификаторы записанных вакансий сохраняются рядом с итоговым файлом и отмечаются в
+    множестве только после его сохранения.
+
+    Attributes:
+        file_name (str): Путь к итоговому файлу
+        temp_file (str): Путь к временному файлу
+        file (file): Открытый временный файл
+        writer (csv.DictWriter): Объект для записи строк
+        rows (int): Количество записанных строк
+        seen (SeenIds): Записанные идентификаторы вакансий, None - не проверять повторы
+        ids (list[int]): Идентификаторы вакансий, записанных в файл
+    """
+
+    def __init__(self, file_name, buffer_size=1 << 16, seen=None):
+        """Открывает временный файл и записывает строчку с названиями столбцов.
+
+        Args:
+            file_name (str): Путь к итоговому файлу
+            buffer_size (int): Размер буфера записи в байтах
+            seen (SeenIds): Записанные идентификаторы вакансий, None - не проверять повторы
+        """
+        self.file_name = file_name
+        self.seen = seen
+        self.ids = []
+        self.temp_file = f'{file_name}.{os.getpid()}.{threading.get_ident()}.tmp'
+        self.file = open(self.temp_file, 'w', newline='', encoding='utf-8', buffering=buffer_size)
+        self.writer = csv.DictWriter(self.file, fieldnames=COLUMNS)
+        self.writer.writeheader()
+        self.rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+    def write_page(self, items):
+        """Дописывает в файл вакансии страницы ответа API.
+
+        Args:
+            items (list[dict]): Вакансии из ответа API
+        """
+        if self.seen is not None:
+            items = [vacancy for vacancy in items if self.claim(vacancy)]
+        rows = get_rows(items)
+        self.writer.writerows(rows)
+        self.rows += len(rows)
+
+    def claim(self, vacancy):
+        """Проверяет, что вакансию нужно записать, и занимает ее идентификатор.
+
+        Args:
+            vacancy (dict): Вакансия из ответа API
+
+        Returns:
+            bool: True, если вакансия еще не записана
+        """
+        vacancy_id = safe_get(vacancy, 'id')
+        if vacancy_id is None:
+            return True
+        if not self.seen.claim(int(vacancy_id)):
+            return False
+        self.ids.append(int(vacancy_id))
+        return True
+
+    def commit(self):
+        """Закрывает временный файл и переименовывает его в итоговый."""
+        self.file.close()
+        if self.seen is not None:
+            ids_name = get_ids_name(self.file_name)
+            with open(f'{ids_name}.tmp', 'wb') as file:
+                np.save(file, np.array(self.ids, dtype=np.int64))
+            os.replace(f'{ids_name}.tmp', ids_name)
+        os.replace(self.temp_file, self.file_name)
+        if self.seen is not None:
+            self.seen.commit(self.ids)
+
+    def abort(self):
+        """Закрывает и удаляет временный файл."""
+        self.file.close()
+        os.remove(self.temp_file)
+        if self.seen is not None:
+            self.seen.release(self.ids)
+
+
+def merge_parts(checkpoint_dir, file_name):
+    """Объединяет контрольные точки интервалов в один файл в порядке времени, оставляя одну строчку с названиями
+    столбцов. Файлы копируются блоками без разбора строк.
+
+    Args:
+        checkpoint_dir (str): Директория контрольных точек
+        file_name (str): Путь к файлу вакансий
+    """
+    temp_file = f'{file_name}.{os.getpid()}.tmp'
+    with open(temp_file, 'wb') as output:
+        for index, window in enumerate(get_done_windows(checkpoint_dir)):
+            with open(get_part_name(checkpoint_dir, window), 'rb') as part:
+                header = part.readline()
+                if index == 0:
+                    output.write(header)
+                shutil.copyfileobj(part, output)
+    os.replace(temp_file, file_name)
+
+
+def get_rows(items):
+    """Выбирает из вакансий ответа API значения столбцов файла вакансий.
+
+    Args:
+        items (list[dict]): Вакансии из ответа API
+
+    Returns:
+        list[dict[str: object]]: Строки файла вакансий
+    """
+    return [{'name': safe_get(vacancy, 'name'),
+             'salary_from': safe_get(vacancy, 'salary', 'from'),
+             'salary_to': safe_get(vacancy, 'salary', 'to'),
+             'salary_currency': safe_get(vacancy, 'salary', 'currency'),
+             'area_name': safe_get(vacancy, 'area', 'name'),
+             'published_at': safe_get(vacancy, 'published_at')}
+            for vacancy in items]
+
+
+def get_page(date, window, page, session=requests, base_url=HH_URL):
+    day_start = datetime.combine(date, time())
     params = {
         'page': page,
-        'per_page': 100,
+        'per_page': PER_PAGE,
         'specialization': 1,
-        'date_from': f'{date}T{hour:02}:00:00',
-        'date_to': f'{date}T{hour + 1:02}:00:00'
+        'date_from': (day_start + timedelta(seconds=window[0])).isoformat(),
+        'date_to': (day_start + timedelta(seconds=window[1])).isoformat()
     }
-    res = requests.get('https://api.hh.ru/vacancies', params)
+    res = session.get(base_url, params=params, timeout=TIMEOUT)
     return res
 
 
@@ -45,10 +545,14 @@ def safe_get(vacancy, *keys):
     return vacancy
 
 
-def main():
-    day = 20
-    all_vacancies, date = get_request(day)
-    all_vacancies.to_csv(f'vacancies_for_{date}.csv', index=False)
+def main(first_date=None, last_date=None):
+    if first_date is None:
+        day = 20
+        first_date = datetime(datetime.today().year, datetime.today().month, day).date()
+    files = crawl_days(first_date, last_date or first_date)
+    for date, file_name in files.items():
+        if file_name is None:
+            print(f'За {date} собраны не все интервалы, запустите сбор еще раз')
 
 
 if __name__ == '__main__':
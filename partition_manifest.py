@@ -0,0 +1,217 @@
+import csv
+import hashlib
+import json
+import os
+
+from partitioning import parse_filters, select_partitions
+
+
+MANIFEST_NAME = '_manifest.json'
+
+
+def describe_file(file_name):
+    """Собирает сведения о файле раздела за один проход: количество строк, размер, минимальную и максимальную дату
+    публикации, набор валют, количество различных регионов, контрольную сумму и время изменения.
+
+    Args:
+        file_name (str): Путь к csv файлу раздела
+
+    Returns:
+        dict: Сведения о файле
+    """
+    stat = os.stat(file_name)
+    checksum = hashlib.sha256()
+
+    def read_lines():
+        with open(file_name, 'rb') as file:
+            for line in file:
+                checksum.update(line)
+                yield line.decode('utf-8-sig')
+
+    rows = 0
+    min_published_at = None
+    max_published_at = None
+    currencies = set()
+    areas = set()
+    reader = csv.reader(read_lines())
+    next(reader, None)
+    for row in reader:
+        rows += 1
+        published_at = row[5]
+        if published_at:
+            if min_published_at is None or published_at < min_published_at:
+                min_published_at = published_at
+            if max_published_at is None or published_at > max_published_at:
+                max_published_at = published_at
+        currencies.add(row[3])
+        areas.add(row[4])
+    return {'rows': rows,
+            'bytes': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'min_published_at': min_published_at,
+            'max_published_at': max_published_at,
+            'currencies': sorted(currencies),
+            'areas': len(areas),
+            'sha256': checksum.hexdigest()}
+
+
+def is_stale(entry, file_name):
+    """Проверяет по размеру и времени изменения, что файл изменился после записи сведений о нем. Файл при этом не
+    читается.
+
+    Args:
+        entry (dict): Сведения о файле из манифеста
+        file_name (str): Путь к файлу
+
+    Returns:
+        bool: True, если сведения устарели или файла больше нет
+    """
+    try:
+        stat = os.stat(file_name)
+    except OSError:
+        return True
+    return entry is None or entry['bytes'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns
+
+
+def load_manifest(directory):
+    """Читает манифест директории раздела.
+
+    Args:
+        directory (str): Директория раздела
+
+    Returns:
+        dict[str: dict]: Сведения о файлах по их именам, пустой словарь если манифеста нет
+    """
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), encoding='utf-8') as file:
+            return json.load(file)['files']
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def build_manifest(directory):
+    """Записывает манифест директории раздела. Сведения о файлах, которые не изменились с прошлого раза, не
+    пересчитываются.
+
+    Args:
+        directory (str): Директория раздела
+
+    Returns:
+        dict[str: dict]: Сведения о файлах по их именам
+    """
+    old_files = load_manifest(directory)
+    files = {}
+    for name in sorted(os.listdir(directory)):
+        file_name = os.path.join(directory, name)
+        if not name.endswith('.csv') or not os.path.isfile(file_name):
+            continue
+        entry = old_files.get(name)
+        files[name] = entry if not is_stale(entry, file_name) else describe_file(file_name)
+    manifest_file = os.path.join(directory, MANIFEST_NAME)
+    temp_file = f'{manifest_file}.{os.getpid()}.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as file:
+        json.dump({'files': files}, file, ensure_ascii=False, indent=1)
+    os.replace(temp_file, manifest_file)
+    return files
+
+
+def build_manifests(root):
+    """Записывает манифесты во все директории разбиения, в которых есть csv файлы.
+
+    Args:
+        root (str): Корневая директория разбиения
+    """
+    for directory, _, file_names in os.walk(root):
+        if any(name.endswith('.csv') for name in file_names):
+            build_manifest(directory)
+
+
+def get_file_entry(file_name, manifests=None):
+    """Возвращает актуальные сведения о файле из манифеста его директории.
+
+    Args:
+        file_name (str): Путь к файлу
+        manifests (dict[str: dict]): Уже прочитанные манифесты по директориям
+
+    Returns:
+        dict: Сведения о файле, None если их нет или они устарели
+    """
+    directory, name = os.path.split(file_name)
+    if manifests is None:
+        manifests = {}
+    if directory not in manifests:
+        manifests[directory] = load_manifest(directory)
+    entry = manifests[directory].get(name)
+    return None if is_stale(entry, file_name) else entry
+
+
+def entry_matches(entry, filters):
+    """Проверяет по минимальной и максимальной дате публикации и набору валют, может ли файл содержать подходящие
+    строки.
+
+    Args:
+        entry (dict): Сведения о файле из манифеста
+        filters (list[tuple]): Разобранные условия фильтрации
+
+    Returns:
+        bool: False, если подходящих строк в файле точно нет
+
+    >>> entry = {'rows': 10, 'min_published_at': '2015-01-03T00:00:00+0300', 'max_published_at': '2016-05-03T00:00:00+0300', 'currencies': ['RUR', 'USD']}
+    >>> entry_matches(entry, parse_filters(['year>=2017'])), entry_matches(entry, parse_filters(['year<2016', 'currency=USD']))
+    (False, True)
+    >>> entry_matches(entry, parse_filters(['currency=EUR']))
+    False
+    """
+    if entry['rows'] == 0:
+        return False
+    if entry['min_published_at'] is None:
+        return True
+    min_year = int(entry['min_published_at'][:4])
+    max_year = int(entry['max_published_at'][:4])
+    for key, op, value in filters:
+        if key == 'year':
+            if op == '=' and not min_year <= value <= max_year:
+                return False
+            if (op == '>=' and max_year < value) or (op == '>' and max_year <= value):
+                return False
+            if (op == '<=' and min_year > value) or (op == '<' and min_year >= value):
+                return False
+            if op == '!=' and min_year == max_year == value:
+                return False
+        elif key == 'currency':
+            if op == '=' and value not in entry['currencies']:
+                return False
+            if op == '!=' and entry['currencies'] == [value]:
+                return False
+    return True
+
+
+def plan_partitions(root, filters=()):
+    """Составляет план чтения разделов: отбрасывает разделы по их путям и по сведениям из манифестов и упорядочивает
+    оставшиеся файлы от самого большого к самому маленькому. Файлы без актуальных сведений не отбрасываются.
+
+    Args:
+        root (str): Корневая директория разбиения
+        filters (iterable[str or tuple]): Условия фильтрации
+
+    Returns:
+        list[str]: Пути к файлам разделов
+    """
+    filters = parse_filters(filters)
+    manifests = {}
+    planned = []
+    for file_name in select_partitions(root, filters):
+        entry = get_file_entry(file_name, manifests)
+        if entry is not None and not entry_matches(entry, filters):
+            continue
+        planned.append((entry['bytes'] if entry is not None else os.path.getsize(file_name), file_name))
+    planned.sort(key=lambda x: -x[0])
+    return [file_name for _, file_name in planned]
+
+
+def main():
+    build_manifests(os.path.join(os.getcwd(), 'years'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+import operator
+import os
+import re
+from urllib.parse import quote, unquote
+
+from date_parsing import parse_year_month
+
+
+PARTITION_KEYS = ('year', 'month', 'currency', 'area_name')
+NUMERIC_KEYS = ('year', 'month')
+KEY_ALIASES = {'years': 'year', 'months': 'month', 'salary_currency': 'currency', 'area': 'area_name'}
+OPERATORS = {'>=': operator.ge, '<=': operator.le, '!=': operator.ne, '=': operator.eq, '>': operator.gt,
+             '<': operator.lt}
+FILTER_PATTERN = re.compile(r'^\s*(\w+)\s*(>=|<=|!=|=|>|<)\s*(.*?)\s*$')
+YEAR_FILE_PATTERN = re.compile(r'^(\d{4})_year\.csv$')
+
+
+def get_partition_values(row, keys):
+    """Вычисляет значения ключей разбиения для строки файла с вакансиями.
+
+    Args:
+        row (list[str]): Строка файла: название, нижняя и верхняя граница оклада, валюта, регион, дата публикации
+        keys (tuple[str]): Ключи разбиения из PARTITION_KEYS
+
+    Returns:
+        tuple[str]: Значения ключей
+
+    >>> get_partition_values(['IT аналитик', '35000.0', '', 'RUR', 'Москва', '2007-12-03T17:34:36+0300'], ('year', 'area_name'))
+    ('2007', 'Москва')
+    """
+    values = {'year': row[5][:4], 'month': row[5][5:7], 'currency': row[3], 'area_name': row[4]}
+    return tuple(values[key] for key in keys)
+
+
+def get_partition_dir(root, keys, values):
+    """Возвращает директорию раздела, в пути которой закодированы ключи в виде "ключ=значение".
+
+    Args:
+        root (str): Корневая директория разбиения
+        keys (tuple[str]): Ключи разбиения
+        values (tuple[str]): Значения ключей
+
+    Returns:
+        str: Путь к директории раздела
+
+    >>> get_partition_dir('parts', ('year', 'area_name'), ('2007', 'Ростов-на-Дону/Юг')).replace(os.sep, '/')
+    'parts/year=2007/area_name=%D0%A0%D0%BE%D1%81%D1%82%D0%BE%D0%B2-%D0%BD%D0%B0-%D0%94%D0%BE%D0%BD%D1%83%2F%D0%AE%D0%B3'
+    """
+    return os.path.join(root, *(f'{key}={quote(value, safe="")}' for key, value in zip(keys, values)))
+
+
+def parse_filter(text):
+    """Разбирает условие фильтрации вида "year>=2018" или "area_name=Москва".
+
+    Args:
+        text (str): Условие фильтрации
+
+    Returns:
+        tuple[str, str, str or int]: Ключ, оператор сравнения, значение
+
+    >>> parse_filter('years>=2018')
+    ('year', '>=', 2018)
+    >>> parse_filter('area_name=Москва')
+    ('area_name', '=', 'Москва')
+    """
+    match = FILTER_PATTERN.match(text)
+    if match is None:
+        raise ValueError(f'Некорректное условие фильтрации: {text}')
+    key, op, value = match.groups()
+    key = KEY_ALIASES.get(key, key)
+    if key not in PARTITION_KEYS:
+        raise ValueError(f'Неизвестный ключ фильтрации: {key}')
+    if key in NUMERIC_KEYS:
+        value = int(value)
+    return key, op, value
+
+
+def parse_filters(filters):
+    """Разбирает список условий фильтрации, пропуская уже разобранные.
+
+    Args:
+        filters (iterable[str or tuple]): Условия фильтрации
+
+    Returns:
+        list[tuple[str, str, str or int]]: Разобранные условия
+    """
+    return [parse_filter(condition) if isinstance(condition, str) else condition for condition in filters]
+
+
+def value_matches(key, value, filters):
+    """Проверяет значение одного ключа по всем условиям для этого ключа.
+
+    Args:
+        key (str): Ключ
+        value (str): Значение ключа
+        filters (list[tuple]): Разобранные условия фильтрации
+
+    Returns:
+        bool: False, если значение не удовлетворяет хотя бы одному условию
+    """
+    for filter_key, op, expected in filters:
+        if filter_key != key:
+            continue
+        if key in NUMERIC_KEYS:
+            try:
+                value = int(value)
+            except ValueError:
+                return False
+        if not OPERATORS[op](value, expected):
+            return False
+    return True
+
+
+def partition_matches(values, filters):
+    """Проверяет, может ли раздел с известными значениями ключей содержать подходящие строки. Условия по ключам,
+    которые не закодированы в разделе, не отбрасывают его.
+
+    Args:
+        values (dict[str: str]): Известные значения ключей раздела
+        filters (list[tuple]): Разобранные условия фильтрации
+
+    Returns:
+        bool: True, если раздел нужно читать
+
+    >>> partition_matches({'year': '2017'}, parse_filters(['year>=2018', 'area_name=Москва']))
+    False
+    >>> partition_matches({'year': '2019'}, parse_filters(['year>=2018', 'area_name=Москва']))
+    True
+    """
+    return all(value_matches(key, value, filters) for key, value in values.items())
+
+
+def get_path_values(name):
+    """Возвращает значения ключей, закодированные в имени директории или файла раздела. Поддерживаются директории
+    вида "ключ=значение" и файлы вида "<год>_year.csv" из DataSeparation.
+
+    Args:
+        name (str): Имя директории или файла
+
+    Returns:
+        dict[str: str]: Значения ключей
+
+    >>> get_path_values('2019_year.csv'), get_path_values('area_name=%D0%9E%D0%BC%D1%81%D0%BA')
+    ({'year': '2019'}, {'area_name': 'Омск'})
+    """
+    match = YEAR_FILE_PATTERN.match(name)
+    if match is not None:
+        return {'year': match.group(1)}
+    key, separator, value = name.partition('=')
+    if separator and key in PARTITION_KEYS:
+        return {key: unquote(value)}
+    return {}
+
+
+def select_partitions(root, filters=()):
+    """Находит csv файлы разделов, которые могут содержать подходящие под условия строки. Директории, не
+    удовлетворяющие условиям, не просматриваются.
+
+    Args:
+        root (str): Корневая директория разбиения
+        filters (iterable[str or tuple]): Условия фильтрации, например "year>=2018", "area_name=Москва"
+
+    Returns:
+        list[str]: Пути к файлам разделов
+    """
+    filters = parse_filters(filters)
+    files = []
+    for directory, dir_names, file_names in os.walk(root):
+        dir_names[:] = sorted(name for name in dir_names if partition_matches(get_path_values(name), filters))
+        files.extend(os.path.join(directory, name) for name in sorted(file_names)
+                     if name.endswith('.csv') and partition_matches(get_path_values(name), filters))
+    return files
+
+
+def row_matches(row, filters):
+    """Проверяет строку файла по условиям фильтрации, которые не удалось применить на уровне разделов.
+
+    Args:
+        row (list[str]): Строка файла
+        filters (list[tuple]): Разобранные условия фильтрации
+
+    Returns:
+        bool: True, если строка удовлетворяет всем условиям
+
+    >>> row_matches(['IT аналитик', '35000.0', '', 'RUR', 'Москва', '2019-12-03T17:34:36+0300'], parse_filters(['year>=2018', 'area_name=Омск']))
+    False
+    """
+    return all(value_matches(key, get_partition_values(row, (key,))[0], filters) for key in {f[0] for f in filters})
+
+
+def filter_dataframe(df, filters):
+    """Оставляет в таблице вакансий только строки, удовлетворяющие условиям фильтрации.
+
+    Args:
+        df (pd.DataFrame): Вакансии со столбцами salary_currency, area_name, published_at
+        filters (list[tuple]): Разобранные условия фильтрации
+
+    Returns:
+        pd.DataFrame: Подходящие вакансии
+    """
+    if not filters:
+        return df
+    years, months = parse_year_month(df['published_at'])
+    columns = {'year': years, 'month': months,
+               'currency': df['salary_currency'], 'area_name': df['area_name']}
+    mask = True
+    for key, op, value in filters:
+        mask = mask & compare_column(columns[key], op, value)
+    return df[mask]
+
+
+def compare_column(column, op, value):
+    """Сравнивает столбец со значением. Категориальные столбцы сравниваются по словарю значений, а результат
+    переносится на строки по кодам, поэтому каждое различное значение сравнивается один раз.
+
+    Args:
+        column (pd.Series): Столбец
+        op (str): Оператор сравнения из OPERATORS
+        value (str or int): Значение
+
+    Returns:
+        pd.Series or np.ndarray: Маска подходящих строк
+    """
+    if not hasattr(column, 'cat'):
+        return OPERATORS[op](column, value)
+    matches = OPERATORS[op](column.cat.categories.to_series(), value).to_numpy()
+    codes = column.cat.codes.to_numpy()
+    return (codes >= 0) & matches[codes]
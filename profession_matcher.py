@@ -0,0 +1,105 @@
+import math
+from collections import deque
+
+
+class ProfessionMatcher:
+    """Автомат Ахо-Корасик для поиска сразу всех названий профессий в названии вакансии за один проход по строке.
+    Результат совпадает с проверками "profession_name in name" для каждой профессии, но время не зависит от
+    количества профессий. Результаты для повторяющихся названий вакансий запоминаются.
+
+    Attributes:
+        professions (list[str]): Названия профессий
+        transitions (list[dict[str: int]]): Переходы автомата по символам
+        fail (list[int]): Суффиксные ссылки состояний
+        outputs (list[tuple[int]]): Индексы профессий, найденных при достижении состояния
+        cache (dict[str: tuple[int]]): Запомненные результаты по названиям вакансий
+    """
+
+    def __init__(self, professions):
+        """Строит автомат по названиям профессий.
+
+        Args:
+            professions (list[str]): Названия профессий
+
+        >>> ProfessionMatcher(['аналитик', 'Аналитик', 'программист']).match('Аналитик-программист')
+        (1, 2)
+        """
+        self.professions = list(professions)
+        self.transitions = [{}]
+        self.fail = [0]
+        outputs = [set()]
+        for index, profession in enumerate(self.professions):
+            state = 0
+            for char in profession:
+                next_state = self.transitions[state].get(char)
+                if next_state is None:
+                    next_state = self.transitions[state][char] = len(self.transitions)
+                    self.transitions.append({})
+                    self.fail.append(0)
+                    outputs.append(set())
+                state = next_state
+            outputs[state].add(index)
+
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                fail_state = self.fail[state]
+                while fail_state and char not in self.transitions[fail_state]:
+                    fail_state = self.fail[fail_state]
+                self.fail[next_state] = self.transitions[fail_state].get(char, 0)
+                outputs[next_state] |= outputs[self.fail[next_state]]
+        self.outputs = [tuple(sorted(output)) for output in outputs]
+        self.cache = {}
+
+    def match(self, name):
+        """Находит все профессии, названия которых встречаются в названии вакансии.
+
+        Args:
+            name (str): Название вакансии
+
+        Returns:
+            tuple[int]: Индексы найденных профессий по возрастанию
+        """
+        result = self.cache.get(name)
+        if result is not None:
+            return result
+        found = set(self.outputs[0])
+        state = 0
+        transitions = self.transitions
+        for char in name:
+            while state and char not in transitions[state]:
+                state = self.fail[state]
+            state = transitions[state].get(char, 0)
+            found.update(self.outputs[state])
+        result = self.cache[name] = tuple(sorted(found))
+        return result
+
+
+def get_professions_statistics(sum_salary, number_vacancies, professions):
+    """Переводит суммы зарплат и количества вакансий по профессиям и годам в формат DataSet.calculate_statistics:
+    словари с годами 2007-2022 и целой частью среднего значения.
+
+    Args:
+        sum_salary (dict[tuple[int, int]: float]): Суммы зарплат по (индекс профессии, год)
+        number_vacancies (dict[tuple[int, int]: int]): Количества вакансий по (индекс профессии, год)
+        professions (list[str]): Названия профессий
+
+    Returns:
+        dict[str: list[dict[int: int]]]: Для каждой профессии: уровень зарплат по годам, количество вакансий по годам
+
+    >>> get_professions_statistics({(0, 2007): 90001.0}, {(0, 2007): 2}, ['аналитик'])['аналитик'][0][2007]
+    45000
+    """
+    years = set(range(2007, 2023)) | {year for _, year in number_vacancies}
+    statistic = {}
+    for index, profession in enumerate(professions):
+        salary_by_years = {}
+        number_profession_by_years = {}
+        for year in sorted(years):
+            number = number_vacancies.get((index, year), 0)
+            number_profession_by_years[year] = number
+            salary_by_years[year] = math.floor(sum_salary[(index, year)] / number) if number else 0
+        statistic[profession] = [salary_by_years, number_profession_by_years]
+    return statistic
@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+
+
+RATES_FILE = 'dataframe_currencies.csv'
+rate_matrices = {}
+
+
+class RateMatrix:
+    """Плотная матрица курсов валют к рублю. Строка матрицы - номер месяца от первой даты таблицы курсов, столбец -
+    индекс валюты, поэтому поиск курса не требует просмотра таблицы и выполняется за O(1).
+
+    Attributes:
+        first_year (int): Год первой даты таблицы курсов
+        first_month (int): Месяц первой даты таблицы курсов
+        currencies (list[str]): Валюты в порядке столбцов матрицы, первой всегда идет RUR
+        currency_index (dict[str: int]): Индексы столбцов валют
+        matrix (np.ndarray): Курсы валют, NaN если курс неизвестен
+    """
+
+    def __init__(self, dates, currencies, rates):
+        """Заполняет матрицу курсов.
+
+        Args:
+            dates (list[str]): Даты в формате "%Y-%m"
+            currencies (list[str]): Коды валют
+            rates (np.ndarray): Курсы валют: строка на каждую дату, столбец на каждую валюту
+
+        >>> RateMatrix(['2003-01', '2003-03'], ['USD'], np.array([[31.5], [32.0]])).matrix.shape
+        (3, 2)
+        """
+        years = np.array([int(date[:4]) for date in dates])
+        months = np.array([int(date[5:7]) for date in dates])
+        offsets = years * 12 + months - 1
+        first_offset = offsets.min() if len(offsets) else 0
+        self.first_year, self.first_month = divmod(int(first_offset), 12)
+        self.first_month += 1
+        self.currencies = ['RUR'] + [currency for currency in currencies if currency != 'RUR']
+        self.currency_index = {currency: index for index, currency in enumerate(self.currencies)}
+        number_months = int(offsets.max() - first_offset + 1) if len(offsets) else 0
+        self.matrix = np.full((number_months, len(self.currencies)), np.nan)
+        self.matrix[:, 0] = 1.0
+        columns = [self.currency_index[currency] for currency in currencies if currency != 'RUR']
+        rates = np.asarray(rates, dtype=np.float64)[:, [i for i, currency in enumerate(currencies) if currency != 'RUR']]
+        self.matrix[np.ix_(offsets - first_offset, columns)] = rates
+
+    def get_month_offset(self, year, month):
+        """Вычисляет номер строки матрицы для месяца.
+
+        Args:
+            year (int or np.ndarray): Год
+            month (int or np.ndarray): Месяц
+
+        Returns:
+            int or np.ndarray: Номер месяца от первой даты таблицы курсов
+        """
+        return (year - self.first_year) * 12 + month - self.first_month
+
+    def get_rate(self, date, currency):
+        """Возвращает курс одной валюты на месяц.
+
+        Args:
+            date (str): Дата в формате "%Y-%m"
+            currency (str): Код валюты
+
+        Returns:
+            float: Курс валюты к рублю, NaN если курс неизвестен
+
+        >>> rates = RateMatrix(['2003-01', '2003-02'], ['USD'], np.array([[31.5], [32.0]]))
+        >>> rates.get_rate('2003-02', 'USD'), rates.get_rate('2010-01', 'RUR')
+        (32.0, 1.0)
+        >>> rates.get_rate('2003-02', 'EUR')
+        nan
+        """
+        if currency == 'RUR':
+            return 1.0
+        index = self.currency_index.get(currency)
+        offset = self.get_month_offset(int(date[:4]), int(date[5:7]))
+        if index is None or not 0 <= offset < len(self.matrix):
+            return np.nan
+        return float(self.matrix[offset, index])
+
+    def get_rates(self, years, months, currencies):
+        """Возвращает курсы валют для массивов дат и валют за одно обращение к матрице.
+
+        Args:
+            years (np.ndarray): Годы
+            months (np.ndarray): Месяцы
+            currencies (np.ndarray): Коды валют
+
+        Returns:
+            np.ndarray: Курсы валют к рублю, NaN если курс неизвестен
+
+        >>> rates = RateMatrix(['2003-01', '2003-02'], ['USD'], np.array([[31.5], [32.0]]))
+        >>> rates.get_rates(np.array([2003, 2003, 2004]), np.array([2, 1, 1]), np.array(['USD', 'KZT', 'RUR'], dtype=object))
+        array([32., nan,  1.])
+        """
+        codes, uniques = pd.factorize(np.asarray(currencies, dtype=object))
+        unique_index = np.array([self.currency_index.get(currency, -1) for currency in uniques] + [-1])
+        index = unique_index[codes]
+        offsets = self.get_month_offset(np.asarray(years, dtype=np.int64), np.asarray(months, dtype=np.int64))
+        valid = (index >= 0) & (offsets >= 0) & (offsets < len(self.matrix))
+        rates = np.full(len(index), np.nan)
+        rates[valid] = self.matrix[offsets[valid], index[valid]]
+        rates[index == 0] = 1.0
+        return rates
+
+
+def read_rate_matrix(file_name):
+    """Читает таблицу курсов валют (столбец date и по столбцу на каждую валюту) и строит по ней матрицу курсов.
+
+    Args:
+        file_name (str): Название файла с курсами валют
+
+    Returns:
+        RateMatrix: Матрица курсов валют
+    """
+    currencies_df = pd.read_csv(file_name)
+    currencies = [column for column in currencies_df.columns if column != 'date']
+    return RateMatrix(currencies_df['date'].tolist(), currencies, currencies_df[currencies].to_numpy(dtype=np.float64))
+
+
+def init_rates(file_name=RATES_FILE, rate_matrix=None):
+    """Задает матрицу курсов текущего процесса. Используется как initializer пула: родительский процесс один раз
+    читает таблицу курсов и передает обработчикам уже построенную матрицу, поэтому обработчики не читают csv файл.
+
+    Args:
+        file_name (str): Название файла с курсами валют
+        rate_matrix (RateMatrix): Готовая матрица курсов, None - прочитать из файла
+    """
+    rate_matrices[file_name] = read_rate_matrix(file_name) if rate_matrix is None else rate_matrix
+
+
+def get_rate_matrix(file_name=RATES_FILE):
+    """Возвращает матрицу курсов текущего процесса, читая таблицу курсов при первом обращении. После fork
+    обработчики получают уже прочитанную матрицу родительского процесса.
+
+    Args:
+        file_name (str): Название файла с курсами валют
+
+    Returns:
+        RateMatrix: Матрица курсов валют
+    """
+    if file_name not in rate_matrices:
+        init_rates(file_name)
+    return rate_matrices[file_name]
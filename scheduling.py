@@ -0,0 +1,98 @@
+import io
+import os
+
+import pandas as pd
+
+
+CHUNK_SIZE = 32 << 20
+CATEGORY_COLUMNS = ('name', 'salary_currency', 'area_name')
+
+
+def count_quotes(file, size, block_size=1 << 20):
+    """Считает кавычки в следующих size байтах файла, читая его блоками.
+
+    Args:
+        file (BinaryIO): Открытый файл
+        size (int): Сколько байтов прочитать
+        block_size (int): Размер блока чтения
+
+    Returns:
+        int: Количество кавычек
+    """
+    count = 0
+    while size > 0:
+        block = file.read(min(size, block_size))
+        if not block:
+            break
+        count += block.count(b'"')
+        size -= len(block)
+    return count
+
+
+def split_file(file_name, chunk_size=CHUNK_SIZE):
+    """Делит файл на диапазоны байтов размером около chunk_size. Границы диапазонов сдвигаются на концы записей
+    csv, поэтому каждая строка данных попадает ровно в один диапазон, а заголовок не попадает ни в один. Перевод
+    строки внутри значения в кавычках (csv.writer записывает так многострочные значения) концом записи не
+    считается: после нечетного количества кавычек от начала диапазона запись еще не закончилась.
+
+    Args:
+        file_name (str): Путь к csv файлу
+        chunk_size (int): Желаемый размер диапазона в байтах
+
+    Returns:
+        list[tuple[str, int, int]]: Путь к файлу, начало и конец диапазона
+    """
+    size = os.path.getsize(file_name)
+    chunks = []
+    with open(file_name, 'rb') as file:
+        file.readline()
+        start = file.tell()
+        while start < size:
+            quotes = count_quotes(file, max(chunk_size - 1, 0))
+            line = file.readline()
+            quotes += line.count(b'"')
+            while quotes % 2 and line:
+                line = file.readline()
+                quotes += line.count(b'"')
+            end = min(file.tell(), size)
+            chunks.append((file_name, start, end))
+            start = end
+    return chunks
+
+
+def plan_chunks(files, chunk_size=CHUNK_SIZE):
+    """Составляет список заданий для пула процессов: большие файлы делятся на диапазоны, а все задания
+    упорядочиваются от самого большого к самому маленькому, чтобы самое долгое задание начиналось первым, а не
+    оставалось последним.
+
+    Args:
+        files (iterable[str]): Пути к csv файлам
+        chunk_size (int): Размер диапазона, больше которого файл делится на части
+
+    Returns:
+        list[tuple[str, int, int]]: Задания: путь к файлу, начало и конец диапазона
+    """
+    chunks = [chunk for file_name in files for chunk in split_file(file_name, chunk_size)]
+    chunks.sort(key=lambda chunk: chunk[1] - chunk[2])
+    return chunks
+
+
+def read_chunk(file_name, start=0, end=None):
+    """Читает в DataFrame строки из диапазона байтов csv файла, добавляя к ним заголовок файла. Повторяющиеся
+    строковые столбцы CATEGORY_COLUMNS читаются как категориальные: целые коды и общий словарь значений.
+
+    Args:
+        file_name (str): Путь к csv файлу
+        start (int): Начало диапазона, 0 - сразу после заголовка
+        end (int): Конец диапазона, None - до конца файла
+
+    Returns:
+        pd.DataFrame: Строки диапазона
+    """
+    with open(file_name, 'rb') as file:
+        header = file.readline()
+        if start > file.tell():
+            file.seek(start)
+        data = file.read() if end is None else file.read(max(end - file.tell(), 0))
+    return pd.read_csv(io.BytesIO(header + data), encoding='utf-8-sig',
+                       dtype={column: 'category' for column in CATEGORY_COLUMNS})
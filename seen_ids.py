@@ -0,0 +1,109 @@
+import os
+import threading
+
+import numpy as np
+
+
+GROW_BYTES = 1 << 20
+
+
+class SeenIds:
+    """Множество идентификаторов вакансий на диске в виде битовой карты: бит с номером идентификатора отмечает
+    уже записанную вакансию. Миллион идентификаторов hh.ru занимает около 15 Мб независимо от количества записанных
+    вакансий, а проверка - одно обращение к отображенному в память файлу.
+
+    Идентификаторы сначала занимаются (claim) на время сбора интервала и попадают в файл только при commit, после
+    сохранения интервала, поэтому вакансии прерванного сбора не считаются записанными.
+
+    Attributes:
+        file_name (str): Путь к файлу битовой карты
+        bits (np.memmap): Битовая карта, None если файл пустой
+        pending (set[int]): Занятые, но еще не сохраненные идентификаторы
+        lock (threading.Lock): Блокировка для одновременной работы нескольких потоков
+    """
+
+    def __init__(self, file_name):
+        """Открывает файл битовой карты, создавая его при необходимости.
+
+        Args:
+            file_name (str): Путь к файлу битовой карты
+        """
+        self.file_name = file_name
+        self.bits = None
+        self.pending = set()
+        self.lock = threading.Lock()
+        open(file_name, 'ab').close()
+        self.open_bits()
+
+    def open_bits(self):
+        """Отображает файл битовой карты в память."""
+        size = os.path.getsize(self.file_name)
+        self.bits = np.memmap(self.file_name, dtype=np.uint8, mode='r+', shape=(size,)) if size else None
+
+    def grow(self, max_id):
+        """Увеличивает файл так, чтобы в нем поместился бит max_id.
+
+        Args:
+            max_id (int): Наибольший идентификатор
+        """
+        size = max_id // 8 + 1
+        if self.bits is not None and size <= len(self.bits):
+            return
+        if self.bits is not None:
+            self.bits.flush()
+        with open(self.file_name, 'r+b') as file:
+            file.truncate(-(-size // GROW_BYTES) * GROW_BYTES)
+        self.open_bits()
+
+    def is_saved(self, vacancy_id):
+        return (self.bits is not None and vacancy_id // 8 < len(self.bits)
+                and bool(self.bits[vacancy_id // 8] & (1 << vacancy_id % 8)))
+
+    def __contains__(self, vacancy_id):
+        with self.lock:
+            return vacancy_id in self.pending or self.is_saved(vacancy_id)
+
+    def claim(self, vacancy_id):
+        """Занимает идентификатор, если вакансия еще не записана и не собирается в другом интервале.
+
+        Args:
+            vacancy_id (int): Идентификатор вакансии
+
+        Returns:
+            bool: True, если вакансию нужно записать
+        """
+        with self.lock:
+            if vacancy_id in self.pending or self.is_saved(vacancy_id):
+                return False
+            self.pending.add(vacancy_id)
+            return True
+
+    def release(self, vacancy_ids):
+        """Освобождает идентификаторы прерванного сбора.
+
+        Args:
+            vacancy_ids (iterable[int]): Идентификаторы вакансий
+        """
+        with self.lock:
+            self.pending.difference_update(vacancy_ids)
+
+    def commit(self, vacancy_ids):
+        """Отмечает вакансии записанными и сохраняет битовую карту на диск.
+
+        Args:
+            vacancy_ids (iterable[int]): Идентификаторы записанных вакансий
+        """
+        ids = np.fromiter(vacancy_ids, dtype=np.int64)
+        with self.lock:
+            if len(ids):
+                self.grow(int(ids.max()))
+                np.bitwise_or.at(self.bits, ids // 8, (1 << ids % 8).astype(np.uint8))
+                self.bits.flush()
+            self.pending.difference_update(ids.tolist())
+
+    def close(self):
+        """Сохраняет и закрывает битовую карту."""
+        with self.lock:
+            if self.bits is not None:
+                self.bits.flush()
+            self.bits = None
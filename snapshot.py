@@ -0,0 +1,290 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from partition_manifest import is_stale
+from scheduling import read_chunk
+
+
+SNAPSHOT_SUFFIX = '.snapshot'
+META_NAME = 'meta.json'
+VOCABULARY_NAME = 'vocabulary.json'
+OFFSETS_NAME = 'offsets.npy'
+snapshots = {}
+
+
+def get_snapshot_dir(file_name):
+    """Возвращает путь к директории снимка csv файла. Снимок лежит рядом с файлом, поэтому select_partitions и
+    манифесты его не замечают: в директории снимка нет csv файлов.
+
+    Args:
+        file_name (str): Путь к csv файлу
+
+    Returns:
+        str: Путь к директории снимка
+
+    >>> get_snapshot_dir(os.path.join('years', '2019_year.csv')) == os.path.join('years', '2019_year.csv.snapshot')
+    True
+    """
+    return file_name + SNAPSHOT_SUFFIX
+
+
+def get_row_offsets(file_name):
+    """Находит смещения начала непустых строк данных файла. По ним диапазоны байтов из plan_chunks переводятся в
+    номера строк снимка.
+
+    Args:
+        file_name (str): Путь к csv файлу
+
+    Returns:
+        np.ndarray: Смещения строк данных в байтах
+    """
+    with open(file_name, 'rb') as file:
+        data = np.frombuffer(file.read(), dtype=np.uint8)
+    starts = np.concatenate(([0], np.flatnonzero(data == ord('\n')) + 1))
+    starts = starts[starts < len(data)]
+    ends = np.append(starts[1:], len(data))
+    blank = (ends - starts == 1) | ((ends - starts == 2) & (data[np.minimum(starts, len(data) - 1)] == ord('\r')))
+    return starts[1:][~blank[1:]].astype(np.int64)
+
+
+def encode_snapshot_column(column):
+    """Переводит столбец DataFrame из read_chunk в массив фиксированной ширины: числовые столбцы сохраняются как
+    есть, категориальные - кодами категорий, строки - байтами фиксированной длины (или символами, если в столбце
+    есть не ASCII символы); пропуски строк сохраняются пустой строкой.
+
+    Args:
+        column (pd.Series): Столбец
+
+    Returns:
+        np.ndarray, list or None: Массив значений, словарь значений для категориального столбца
+
+    >>> encode_snapshot_column(pd.Series(['2007-12', None]))
+    (array([b'2007-12', b''], dtype='|S7'), None)
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return np.ascontiguousarray(column.cat.codes.to_numpy()), column.cat.categories.tolist()
+    if column.dtype.kind in 'biuf':
+        return np.ascontiguousarray(column.to_numpy()), None
+    values = column.fillna('').astype(str).to_numpy(dtype=object)
+    try:
+        return values.astype('S'), None
+    except UnicodeEncodeError:
+        return values.astype('U'), None
+
+
+def get_column_text(values, vocabulary=None):
+    """Переводит массив столбца из снимка в строки, как их возвращает csv.reader: пропуски становятся пустыми
+    строками.
+
+    Args:
+        values (np.ndarray): Массив столбца из снимка
+        vocabulary (list or None): Словарь категориального столбца
+
+    Returns:
+        np.ndarray: Строки столбца
+
+    >>> get_column_text(np.array([1.5, np.nan])).tolist(), get_column_text(np.array([0, -1]), ['RUR']).tolist()
+    (['1.5', ''], ['RUR', ''])
+    """
+    if vocabulary is not None:
+        return np.array(vocabulary + [''], dtype=object)[values]
+    if values.dtype.kind == 'f':
+        return np.where(np.isnan(values), '', values.astype(str))
+    return values.astype(str)
+
+
+def write_snapshot(file_name):
+    """Записывает снимок csv файла: по файлу .npy на столбец, словари категориальных столбцов и смещения строк.
+    Если текст столбца не восстанавливается из его значений (числа читаются как float и '12201' превращается в
+    '12201.0', а строки 'NA', 'None' и подобные pandas считает пропусками), рядом сохраняется исходный текст
+    столбца для read_snapshot_rows. Снимок сначала собирается во временной директории, поэтому читатели никогда
+    не видят его наполовину записанным.
+
+    Args:
+        file_name (str): Путь к csv файлу
+
+    Returns:
+        str: Путь к директории снимка
+    """
+    stat = os.stat(file_name)
+    df = read_chunk(file_name)
+    offsets = get_row_offsets(file_name)
+    if len(offsets) != len(df):
+        raise ValueError(f'Строки файла {file_name} не совпадают со строками csv: в значениях есть переводы строк')
+    directory = get_snapshot_dir(file_name)
+    temp_directory = f'{directory}.{os.getpid()}.tmp'
+    shutil.rmtree(temp_directory, ignore_errors=True)
+    os.mkdir(temp_directory)
+    text = pd.read_csv(file_name, encoding='utf-8-sig', dtype=str, keep_default_na=False)
+    columns = []
+    text_columns = []
+    vocabularies = {}
+    for index, column_name in enumerate(df.columns):
+        values, vocabulary = encode_snapshot_column(df[column_name])
+        np.save(os.path.join(temp_directory, f'{index}.npy'), values)
+        columns.append(column_name)
+        if vocabulary is not None:
+            vocabularies[column_name] = vocabulary
+        if not np.array_equal(get_column_text(values, vocabulary), text.iloc[:, index].to_numpy(dtype=str)):
+            np.save(os.path.join(temp_directory, f'{index}.text.npy'), encode_snapshot_column(text.iloc[:, index])[0])
+            text_columns.append(index)
+    np.save(os.path.join(temp_directory, OFFSETS_NAME), offsets)
+    with open(os.path.join(temp_directory, VOCABULARY_NAME), 'w', encoding='utf-8') as file:
+        json.dump(vocabularies, file, ensure_ascii=False)
+    with open(os.path.join(temp_directory, META_NAME), 'w', encoding='utf-8') as file:
+        json.dump({'bytes': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'rows': len(df), 'columns': columns,
+                   'text_columns': text_columns}, file, ensure_ascii=False)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(temp_directory, directory)
+    snapshots.pop(directory, None)
+    return directory
+
+
+def write_snapshots(root):
+    """Записывает снимки всех csv файлов директории разбиения, для которых нет актуального снимка. Файл, снимок
+    которого записать нельзя (например, в значениях есть переводы строк), пропускается и дальше читается из csv.
+
+    Args:
+        root (str): Корневая директория разбиения
+
+    Returns:
+        list[str]: Пути к записанным снимкам
+    """
+    written = []
+    for directory, _, file_names in os.walk(root):
+        for name in sorted(file_names):
+            file_name = os.path.join(directory, name)
+            if not name.endswith('.csv') or open_snapshot(file_name) is not None:
+                continue
+            try:
+                written.append(write_snapshot(file_name))
+            except ValueError as error:
+                print(f'{error}; файл будет читаться из csv')
+    return written
+
+
+def open_snapshot(file_name):
+    """Открывает актуальный снимок csv файла: столбцы отображаются в память без чтения (np.load с mmap_mode='r'),
+    поэтому несколько процессов используют одни и те же страницы кэша файловой системы. Открытые снимки
+    запоминаются в процессе.
+
+    Args:
+        file_name (str): Путь к csv файлу
+
+    Returns:
+        dict: Описание снимка, массивы столбцов, исходный текст столбцов, словари и смещения строк; None если снимка
+        нет или файл изменился после его записи
+    """
+    directory = get_snapshot_dir(file_name)
+    try:
+        with open(os.path.join(directory, META_NAME), encoding='utf-8') as file:
+            meta = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if is_stale(meta, file_name):
+        return None
+    snapshot = snapshots.get(directory)
+    if snapshot is None or snapshot['meta'] != meta:
+        with open(os.path.join(directory, VOCABULARY_NAME), encoding='utf-8') as file:
+            vocabularies = json.load(file)
+        snapshot = snapshots[directory] = {
+            'meta': meta,
+            'arrays': [np.load(os.path.join(directory, f'{index}.npy'), mmap_mode='r')
+                       for index in range(len(meta['columns']))],
+            'texts': {index: np.load(os.path.join(directory, f'{index}.text.npy'), mmap_mode='r')
+                      for index in meta.get('text_columns', [])},
+            'vocabularies': vocabularies,
+            'offsets': np.load(os.path.join(directory, OFFSETS_NAME), mmap_mode='r')}
+    return snapshot
+
+
+def decode_snapshot_column(values, vocabulary=None):
+    """Восстанавливает столбец в том виде, в котором его возвращает read_chunk.
+
+    Args:
+        values (np.ndarray): Массив столбца из снимка
+        vocabulary (list or None): Словарь категориального столбца
+
+    Returns:
+        pd.Series or pd.Categorical: Столбец
+    """
+    if vocabulary is not None:
+        return pd.Categorical.from_codes(values, categories=vocabulary)
+    if values.dtype.kind in 'SU':
+        values = values.astype(str)
+        return pd.Series(values).where(values != '')
+    return values
+
+
+def load_snapshot(file_name, start=0, end=None):
+    """Загружает из снимка строки диапазона байтов csv файла. Числовые столбцы и коды категорий ссылаются на
+    отображенные в память файлы без копирования.
+
+    Args:
+        file_name (str): Путь к csv файлу
+        start (int): Начало диапазона, 0 - сразу после заголовка
+        end (int): Конец диапазона, None - до конца файла
+
+    Returns:
+        pd.DataFrame: Строки диапазона, None если актуального снимка нет
+    """
+    snapshot = open_snapshot(file_name)
+    if snapshot is None:
+        return None
+    offsets = snapshot['offsets']
+    first = int(np.searchsorted(offsets, start))
+    last = len(offsets) if end is None else int(np.searchsorted(offsets, end))
+    vocabularies = snapshot['vocabularies']
+    return pd.DataFrame({column_name: decode_snapshot_column(values[first:last], vocabularies.get(column_name))
+                         for column_name, values in zip(snapshot['meta']['columns'], snapshot['arrays'])})
+
+
+def read_frame(file_name, start=0, end=None):
+    """Читает строки диапазона файла из актуального снимка, а если его нет - из csv файла.
+
+    Args:
+        file_name (str): Путь к csv файлу
+        start (int): Начало диапазона, 0 - сразу после заголовка
+        end (int): Конец диапазона, None - до конца файла
+
+    Returns:
+        pd.DataFrame: Строки диапазона
+    """
+    df = load_snapshot(file_name, start, end)
+    return read_chunk(file_name, start, end) if df is None else df
+
+
+def read_snapshot_rows(file_name):
+    """Восстанавливает из снимка строки csv файла в виде списков строк, как их возвращает csv.reader: значения
+    совпадают с текстом файла, пропуски становятся пустыми строками.
+
+    Args:
+        file_name (str): Путь к csv файлу
+
+    Returns:
+        list[list[str]], list[str]: Строки данных и строчка с названиями столбцов; None, None если актуального
+        снимка нет
+    """
+    snapshot = open_snapshot(file_name)
+    if snapshot is None:
+        return None, None
+    columns = []
+    for index, (column_name, values) in enumerate(zip(snapshot['meta']['columns'], snapshot['arrays'])):
+        if index in snapshot['texts']:
+            column = snapshot['texts'][index].astype(str)
+        else:
+            column = get_column_text(values, snapshot['vocabularies'].get(column_name))
+        columns.append(column.tolist())
+    return [list(row) for row in zip(*columns)], list(snapshot['meta']['columns'])
+
+
+def main():
+    write_snapshots(os.path.join(os.getcwd(), 'years'))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,19 @@
 import matplotlib.pyplot as plt
 import numpy as np
-from multiprocessing import Pool
+from functools import partial
 import os
-import pandas as pd
 from jinja2 import Environment, FileSystemLoader
 import pdfkit
 import re
 
-currencies_df = pd.read_csv('dataframe_currencies.csv')
+from aggregates import aggregate_dataframe, merge_aggregates
+from executor import run_tasks
+from partition_manifest import plan_partitions
+from partitioning import filter_dataframe, parse_filters
+from rate_matrix import RATES_FILE, get_rate_matrix, init_rates
+from scheduling import plan_chunks
+from snapshot import read_frame
+from vectorized_salary import get_salaries
 
 
 class Report:
@@ -93,83 +99,63 @@ class Report:
         pdfkit.from_string(pdf_template, 'report_city.pdf', configuration=config, options={'enable-local-file-access': None})
 
 
-def get_salary(series):
-    date = parse_date(series['published_at'])
-    date = f'{date[0]}-{date[1]:02}'
-    if not pd.isna(series['salary_from']) and not pd.isna(series['salary_to']):
-        salary = convert_to_rubles((int(float(series['salary_from'])) + int(float(series['salary_to']))) / 2, series['salary_currency'], date)
-    elif not pd.isna(series['salary_from']):
-        salary = convert_to_rubles(int(float(series['salary_from'])), series['salary_currency'], date)
-    elif not pd.isna(series['salary_to']):
-        salary = convert_to_rubles(int(float(series['salary_to'])), series['salary_currency'], date)
-    else:
-        salary = np.NaN
-    return salary
+def get_data(file_name, filters=(), start=0, end=None):
+    df = filter_dataframe(read_frame(file_name, start, end), parse_filters(filters))
+    if len(df) == 0:
+        print('Нет данных')
+    df['salary'] = get_salaries(df, get_rate_matrix())
+    return df.drop(['salary_from', 'salary_to', 'salary_currency'], axis=1)
 
 
-def parse_date(date):
-    parsed_date = date.replace('T', '-').replace(':', '-').replace('+', '-').split('-')
-    return int(parsed_date[0]), int(parsed_date[1])
+def get_aggregate(chunk, profession_name, area_name=None, filters=()):
+    """Вычисляет частичную статистику по одному диапазону файла. Вызывается в процессе-обработчике, чтобы в
+    родительский процесс передавались суммы и количества, а не все вакансии файла.
 
+    Args:
+        chunk (tuple[str, int, int]): Путь к файлу, начало и конец диапазона из plan_chunks
+        profession_name (str): Название профессии
+        area_name (str): Название региона, None - собрать матрицу годы x регионы для всех регионов сразу
+        filters (list[tuple]): Условия фильтрации строк
 
-def convert_to_rubles(salary, currency, date):
-    try:
-        if currency == "RUR":
-            return salary
-        else:
-            return int(salary * currencies_df.loc[currencies_df['date'] == date, currency].values[0])
-    except:
-        return np.NaN
+    Returns:
+        VacancyAggregate: Частичная статистика
+    """
+    file_name, start, end = chunk
+    return aggregate_dataframe(get_data(file_name, filters, start, end), profession_name, area_name,
+                               by_region=area_name is None)
 
 
-def get_data(file_name):
-    df = pd.read_csv(file_name)
-    if len(df) == 0:
-        print('Нет данных')
-    else:
-        df['salary'] = df[['salary_from', 'salary_to', 'salary_currency', 'published_at']].apply(get_salary, axis=1)
-        df = df.drop(['salary_from', 'salary_to', 'salary_currency'], axis=1)
-        return df
-
-
-def calculate_year_statistics(df_vacancies, profession_name, area_name):
-    year = parse_date(df_vacancies.iloc[0]['published_at'])[0]
-    statistic_year = pd.DataFrame(index=[year])
-    suitable_vacancies = df_vacancies[df_vacancies['salary'].notna()]
-    statistic_year['year'] = year
-    statistic_year['salary_by_years'] = int(suitable_vacancies['salary'].mean())
-    statistic_year['salary_by_years_profession'] = int(suitable_vacancies[suitable_vacancies['name'].str.contains(profession_name)]['salary'].mean())
-    statistic_year['salary_by_years_city'] = int(suitable_vacancies.loc[suitable_vacancies['area_name'] == area_name, 'salary'].mean())
-    statistic_year['number_vac_by_years'] = len(suitable_vacancies)
-    statistic_year['number_profession_by_years'] = suitable_vacancies['name'].str.contains(profession_name).sum()
-    statistic_year['number_city_by_years'] = len(suitable_vacancies[suitable_vacancies['area_name'] == area_name])
-    return statistic_year
-
-
-def calculate_city_statistics(df_vacancies):
-    statistic_city = pd.DataFrame()
-    suitable_vacancies = df_vacancies[df_vacancies['salary'].notna()]
-    statistic_city['percentage_by_city'] = suitable_vacancies['area_name'].value_counts().apply(lambda x: x / len(suitable_vacancies)).round(4)
-    statistic_city['salary_by_city'] = suitable_vacancies.groupby('area_name')['salary'].mean()
-    statistic_city['salary_by_city'] = statistic_city.loc[statistic_city['percentage_by_city'] >= 0.01, 'salary_by_city'].round(0)
-    return statistic_city
-
-
-def main():
+def calculate_regions_statistics(aggregate, area_names=None):
+    """Получает таблицы статистики по годам (get_year_dataframe с with_area) для нескольких регионов из одной
+    общей статистики, собранной get_aggregate без выбранного региона, не перечитывая файлы.
+
+    Args:
+        aggregate (VacancyAggregate): Общая статистика с матрицей годы x регионы
+        area_names (list[str]): Названия регионов, None - все регионы
+
+    Returns:
+        dict[str: pd.DataFrame]: Статистика по годам для каждого региона
+    """
+    if area_names is None:
+        area_names = aggregate.get_regions()
+    region_tables = aggregate.get_region_tables()
+    return {area_name: aggregate.get_year_dataframe(True, area_name, region_tables) for area_name in area_names}
+
+
+def main(filters=(), backend='auto'):
     # name_file = input('Введите название файла: ')
     name_file = 'years'
     # profession_name = input('Введите название профессии: ')
     profession_name = 'Инженер'
     # area_name = input('Введите название региона: ')
     area_name = 'Москва'
-    files = [os.getcwd() + f'\\{name_file}\\' + file for file in os.listdir(os.getcwd() + f'\\{name_file}\\')]
-    with Pool(8) as p:
-        data_years = p.map(get_data, files)
-        tuples_data_profession = [(data, profession_name, area_name) for data in data_years]
-        statistic_year = p.starmap(calculate_year_statistics, tuples_data_profession)
-    full_data = pd.concat(data_years, ignore_index=True)
-    statistic_year = pd.concat(statistic_year, ignore_index=True)
-    statistic_city = calculate_city_statistics(full_data)
+    filters = parse_filters(filters)
+    files = plan_partitions(os.path.join(os.getcwd(), name_file), filters)
+    aggregate = merge_aggregates(run_tasks(partial(get_aggregate, profession_name=profession_name, filters=filters),
+                                           plan_chunks(files), backend, initializer=init_rates,
+                                           initargs=(RATES_FILE, get_rate_matrix())))
+    statistic_year = calculate_regions_statistics(aggregate, [area_name])[area_name]
+    statistic_city = aggregate.get_city_dataframe()
     graph_titles = ['Уровень зарплат по годам', 'Количество вакансий по годам', 'Уровень зарплат по городам',
               'Доля вакансий по городам']
     graph_legends = [['средняя з/п', f'з/п {profession_name.lower()}', f'з/п в регионе\n{area_name.lower()}'],
@@ -1,5 +1,45 @@
+import contextlib
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
 from unittest import TestCase
-from tabular_statistics import DataSet, Vacancy, Salary, csv_reader
+import pandas as pd
+import requests
+from aggregate_store import AggregateStore
+from aggregates import aggregate_dataframe, merge_aggregates
+from currency_rates import collect_currency_rates
+from DataSeparation import separate_file
+from date_parsing import get_year_month, parse_year_month
+from executor import choose_backend, get_task_size, run_tasks
+import graph_statistics
+from http_cache import CachedSession, immutable_after
+from multiprocessing_statistic import get_statistic
+from name_index import NameIndex
+import new_vacancies
+from new_vacancies import (RateLimitedAdapter, RateLimiter, VacancyWriter, crawl_day, crawl_days, create_session,
+                           format_window, get_missing_windows, split_window)
+from partition_manifest import build_manifests, get_file_entry, plan_partitions
+from partitioning import select_partitions
+import pd_currency_conversion
+from profession_matcher import ProfessionMatcher
+from rate_matrix import RateMatrix, get_rate_matrix, init_rates
+from scheduling import plan_chunks, read_chunk, split_file
+from snapshot import load_snapshot, read_frame, read_snapshot_rows, write_snapshot, write_snapshots
+import statistics_by_city
+import statistics_by_years
+import tabular_statistics
+from tabular_statistics import DataSet, Vacancy, Salary, csv_reader, csv_reader_stream
+from vacancy_table import VacancyTable, csv_reader_table
+from vectorized_salary import get_salaries, get_salary_midpoint
+from vocabulary import Vocabulary
 
 
 class DataSetTests(TestCase):
@@ -80,6 +120,24 @@ class DataSetTests(TestCase):
         self.assertEqual(DataSet(file_name, data).calculate_statistics('программист'), expected)
 
 
+    def test_dataset_vacancy_without_vocabulary(self):
+        data = [['IT аналитик', '35000.0', '45000.0', 'RUR', 'Санкт-Петербург', '2007-12-03T17:34:36+0300'],
+                ['PHP-программист', '40000.0', '50000.0', 'RUR', 'Москва', '2007-12-03T22:39:07+0300']]
+        for module in (tabular_statistics, graph_statistics):
+            data_set = module.DataSet('unittest.csv', data[:1])
+            data_set.vacancies_objects.append(module.Vacancy(data[1]))
+            self.assertEqual(data_set.calculate_statistics('аналитик')[5], {'Санкт-Петербург': 0.5, 'Москва': 0.5})
+
+    def test_graph_and_tabular_dataset_match(self):
+        data = [['IT аналитик', '35000.0', '45000.0', 'RUR', 'Санкт-Петербург', '2007-12-03T17:34:36+0300'],
+                ['PHP-программист', '40000.0', '50000.0', 'USD', 'Москва', '2008-12-03T22:39:07+0300'],
+                ['Web-программист', '30000.0', '40000.0', 'RUR', 'Москва', '2007-12-03T19:10:20+0300']]
+        graph_data_set = graph_statistics.DataSet('unittest.csv', data)
+        self.assertIs(graph_data_set.vacancies_objects[1].area_name, graph_data_set.vacancies_objects[2].area_name)
+        self.assertEqual(graph_data_set.calculate_statistics('программист'),
+                         DataSet('unittest.csv', data).calculate_statistics('программист'))
+
+
 class VacancyTests(TestCase):
     def test_vacancy_type(self):
         data = ['Web-программист', '30000.0', '40000.0', 'RUR', 'Москва', '2007-12-03T19:10:20+0300']
@@ -148,4 +206,763 @@ class CsvReaderTests(TestCase):
         self.assertEqual(csv_reader('unittest.csv')[0].file_name, 'unittest.csv')
 
     def test_csv_reader_dataset_vacancies_objects_length(self):
-        self.assertEqual(len(csv_reader('unittest.csv')[0].vacancies_objects), 3) 
+        self.assertEqual(len(csv_reader('unittest.csv')[0].vacancies_objects), 3)
+
+
+class CsvReaderStreamTests(TestCase):
+    def setUp(self):
+        self.data = [['IT аналитик', '32000.0', '56000.0', 'RUR', 'Санкт-Петербург', '2007-12-03T17:34:36+0300'],
+                     ['PHP-программист', '41000.0', '67000.0', 'RUR', 'Москва', '2007-12-03T22:39:07+0300'],
+                     ['Web-программист', '', '40000.0', 'RUR', 'Москва', '2008-12-03T19:10:20+0300'],
+                     ['Web-программист', '30000.0', '40000.0', 'RUR', 'Москва', '2008-12-03T19:10:20+0300']]
+        file = tempfile.NamedTemporaryFile('w', suffix='.csv', newline='', encoding='utf-8', delete=False)
+        with file:
+            writer = csv.writer(file)
+            writer.writerow(['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at'])
+            writer.writerows(self.data)
+        self.file_name = file.name
+
+    def tearDown(self):
+        os.remove(self.file_name)
+
+    def test_csv_reader_stream_keeps_no_vacancies(self):
+        data_set, list_naming = csv_reader_stream(self.file_name)
+        self.assertEqual(list_naming, ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at'])
+        self.assertEqual(data_set.vacancies_objects, [])
+
+    def test_csv_reader_stream_statistics(self):
+        data_set, list_naming = csv_reader_stream(self.file_name)
+        expected = DataSet(self.file_name, self.data).calculate_statistics('программист')
+        self.assertEqual(data_set.calculate_statistics('программист'), expected)
+        self.assertEqual(data_set.number_vacancies, 3)
+        self.assertEqual(data_set.calculate_statistics('программист'), expected)
+
+
+class VacancyTableTests(TestCase):
+    def setUp(self):
+        self.data = [['IT аналитик', '32000.0', '56000.0', 'RUR', 'Санкт-Петербург', '2007-12-03T17:34:36+0300'],
+                     ['PHP-программист', '41000.0', '67000.0', 'RUR', 'Москва', '2007-12-03T22:39:07+0300'],
+                     ['Web-программист', '30000.0', '40000.0', 'KGS', 'Москва', '2008-12-03T19:10:20+0300'],
+                     ['Web-программист', '', '40000.0', 'RUR', 'Москва', '2008-12-03T19:10:20+0300']]
+
+    def test_vacancy_table_length(self):
+        self.assertEqual(len(VacancyTable('unittest.csv', self.data)), 3)
+
+    def test_vacancy_table_columns(self):
+        columns = VacancyTable('unittest.csv', self.data).columns()
+        self.assertEqual(columns['year'].tolist(), [2007, 2007, 2008])
+        self.assertEqual(columns['month'].tolist(), [12, 12, 12])
+        self.assertEqual(columns['area_id'].tolist(), [0, 1, 1])
+
+    def test_vacancy_table_calculate_statistics(self):
+        expected = DataSet('unittest.csv', self.data).calculate_statistics('программист')
+        self.assertEqual(VacancyTable('unittest.csv', self.data).calculate_statistics('программист'), expected)
+
+    def test_vacancy_table_calculate_year_statistics(self):
+        self.assertEqual(VacancyTable('unittest.csv', self.data[:2]).calculate_year_statistics('программист'),
+                         ['2007', 49000, 2, 54000, 1])
+
+
+class CbrStubHandler(BaseHTTPRequestHandler):
+    requests_dates = []
+
+    def do_GET(self):
+        date = parse_qs(urlparse(self.path).query)['date_req'][0]
+        self.requests_dates.append(date)
+        month = int(date[3:5])
+        body = (f'<ValCurs><Valute><NumCode>840</NumCode><CharCode>USD</CharCode><Nominal>1</Nominal>'
+                f'<Name>Доллар США</Name><Value>{30 + month},5</Value></Valute>'
+                f'<Valute><NumCode>398</NumCode><CharCode>KZT</CharCode><Nominal>100</Nominal>'
+                f'<Name>Тенге</Name><Value>20,0</Value></Valute></ValCurs>').encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CollectCurrencyRatesTests(TestCase):
+    def setUp(self):
+        CbrStubHandler.requests_dates = []
+        self.server = HTTPServer(('127.0.0.1', 0), CbrStubHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}/scripts/XML_daily.asp'
+        self.cache_dir = tempfile.mkdtemp()
+        self.data = [['IT аналитик', '32000.0', '56000.0', 'USD', 'Москва', '2007-12-03T17:34:36+0300'],
+                     ['PHP-программист', '41000.0', '67000.0', 'KZT', 'Москва', '2008-02-03T22:39:07+0300']]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.cache_dir)
+
+    def test_collect_currency_rates(self):
+        currency_rates = collect_currency_rates(self.data, ['USD', 'KZT', 'EUR', 'RUR'], max_workers=3,
+                                                cache_dir=self.cache_dir, base_url=self.base_url)
+        self.assertEqual(currency_rates, {'date': ['2007-12', '2008-01', '2008-02'], 'USD': [42.5, 31.5, 32.5],
+                                          'KZT': [0.2, 0.2, 0.2], 'EUR': [None, None, None]})
+        self.assertEqual(sorted(CbrStubHandler.requests_dates), ['01/01/2008', '01/02/2008', '01/12/2007'])
+
+    def test_collect_currency_rates_uses_cache(self):
+        collect_currency_rates(self.data[:1], ['USD'], cache_dir=self.cache_dir, base_url=self.base_url)
+        currency_rates = collect_currency_rates(self.data, ['USD'], cache_dir=self.cache_dir, base_url=self.base_url)
+        self.assertEqual(currency_rates['USD'], [42.5, 31.5, 32.5])
+        self.assertEqual(sorted(CbrStubHandler.requests_dates), ['01/01/2008', '01/02/2008', '01/12/2007'])
+
+
+class SeparateFileTests(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.path, 'vacancies_by_year.csv')
+        self.rows = [['IT аналитик', '32000.0', '56000.0', 'RUR', 'Санкт-Петербург', '2007-12-03T17:34:36+0300'],
+                     ['PHP-программист', '41000.0', '', 'RUR', 'Москва', '2008-12-03T22:39:07+0300'],
+                     ['Web-программист', '30000.0', '40000.0', 'USD', 'Москва', '2007-01-03T19:10:20+0300'],
+                     ['Инженер, "проект"', '', '40000.0', 'RUR', 'Москва', '2009-12-03T19:10:20+0300'],
+                     ['Аналитик', '30000.0', '40000.0', 'RUR', 'Казань', '2008-02-03T19:10:20+0300']]
+        with open(self.file_name, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at'])
+            writer.writerows(self.rows)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def read_year(self, year):
+        with open(os.path.join(self.path, f'{year}_year.csv'), encoding='utf-8') as file:
+            return list(csv.reader(file))
+
+    def test_separate_file(self):
+        self.assertEqual(separate_file(self.file_name, self.path, max_open_files=1), [2007, 2008, 2009])
+        self.assertEqual(self.read_year(2007)[1:], [self.rows[0], self.rows[2]])
+        self.assertEqual(self.read_year(2008)[1:], [self.rows[1], self.rows[4]])
+        self.assertEqual(self.read_year(2009)[0], ['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name',
+                                                   'published_at'])
+
+    def test_split_file_chunks(self):
+        chunks = split_file(self.file_name, chunk_size=50)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(chunks[0][2], chunks[1][1])
+        self.assertEqual(chunks[-1][2], os.path.getsize(self.file_name))
+        df = pd.concat([read_chunk(*chunk) for chunk in plan_chunks([self.file_name], chunk_size=50)])
+        self.assertEqual(sorted(df['published_at']), sorted(row[5] for row in self.rows))
+        self.assertEqual(len(read_chunk(self.file_name)), len(self.rows))
+
+    def test_split_file_multiline_field(self):
+        rows = self.rows[:2] + [['Программист\n"1С"\nв офис', '50000.0', '', 'RUR', 'Омск', '2009-01-03T19:10:20+0300']]
+        rows += self.rows[2:]
+        with open(self.file_name, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at'])
+            writer.writerows(rows)
+        for chunk_size in range(1, 120, 7):
+            chunks = split_file(self.file_name, chunk_size)
+            self.assertEqual([chunk[1] for chunk in chunks[1:]], [chunk[2] for chunk in chunks[:-1]])
+            df = pd.concat([read_chunk(*chunk) for chunk in chunks], ignore_index=True)
+            self.assertEqual(df['name'].tolist(), [row[0] for row in rows])
+
+    def test_statistic_merges_partitions_of_year(self):
+        rows = [['Инженер', '100', '100', 'RUR', 'Москва', '2019-01-03T19:10:20+0300'],
+                ['Инженер-конструктор', '300', '300', 'RUR', 'Омск', '2019-02-03T19:10:20+0300'],
+                ['Аналитик', '500', '500', 'RUR', 'Казань', '2019-03-03T19:10:20+0300'],
+                ['Аналитик', '700', '700', 'RUR', 'Москва', '2020-03-03T19:10:20+0300']]
+        with open(self.file_name, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at'])
+            writer.writerows(rows)
+        for keys in (('year', 'area_name'), ('area_name',)):
+            root = os.path.join(self.path, '_'.join(keys))
+            separate_file(self.file_name, root, keys=keys)
+            files = select_partitions(root)
+            self.assertGreater(len(files), 2)
+            aggregate = merge_aggregates(get_statistic(file_name, 'Инженер') for file_name in files)
+            self.assertEqual(aggregate.get_year_statistics(), [[2019, 300, 3, 200, 2], [2020, 700, 1, 0, 0]])
+
+    def test_separate_file_by_keys(self):
+        root = os.path.join(self.path, 'partitions')
+        separate_file(self.file_name, root, keys=('year', 'area_name'), max_open_files=2)
+        files = select_partitions(root, ['years>=2008', 'area_name=Москва'])
+        self.assertEqual([os.path.relpath(file, root).split(os.sep)[0] for file in files], ['year=2008', 'year=2009'])
+        with open(files[0], encoding='utf-8') as file:
+            self.assertEqual(list(csv.reader(file))[1:], [self.rows[1]])
+        self.assertEqual(len(select_partitions(root)), 5)
+
+    def test_empty_partition_statistics(self):
+        root = os.path.join(self.path, 'partitions')
+        separate_file(self.file_name, root, keys=('year',))
+        file_name, = select_partitions(root, ['years=2009'])
+        self.assertEqual(len(statistics_by_years.get_data(file_name, ['area_name=Казань'])), 0)
+        chunk, = plan_chunks([file_name])
+        empty = statistics_by_years.get_aggregate(chunk, 'Инженер', ['area_name=Казань'])
+        self.assertEqual(empty.get_year_statistics(), [])
+        self.assertEqual(len(statistics_by_city.get_aggregate(chunk, 'Инженер', filters=['area_name=Казань'])
+                             .get_year_dataframe(True, 'Москва')), 0)
+        aggregate = merge_aggregates([empty, pd_currency_conversion.get_aggregate(chunk, 'Аналитик')])
+        self.assertEqual(aggregate.get_year_statistics(), [[2009, 40000, 1, 0, 0]])
+
+    def test_select_partitions_by_year_files(self):
+        root = os.path.join(self.path, 'years')
+        os.mkdir(root)
+        separate_file(self.file_name, root)
+        files = select_partitions(root, ['year<=2008', 'area_name=Москва'])
+        self.assertEqual([os.path.basename(file) for file in files], ['2007_year.csv', '2008_year.csv'])
+
+    def test_partition_manifest(self):
+        root = os.path.join(self.path, 'years')
+        os.mkdir(root)
+        separate_file(self.file_name, root)
+        build_manifests(root)
+        entry = get_file_entry(os.path.join(root, '2007_year.csv'))
+        self.assertEqual((entry['rows'], entry['currencies'], entry['areas']), (2, ['RUR', 'USD'], 2))
+        self.assertEqual(entry['min_published_at'], '2007-01-03T19:10:20+0300')
+        self.assertEqual([os.path.basename(file) for file in plan_partitions(root, ['currency=USD'])], ['2007_year.csv'])
+        with open(os.path.join(root, '2009_year.csv'), 'a', encoding='utf-8') as file:
+            file.write('Аналитик,1000.0,,USD,Омск,2009-01-03T19:10:20+0300\n')
+        self.assertIsNone(get_file_entry(os.path.join(root, '2009_year.csv')))
+        self.assertEqual(len(plan_partitions(root, ['currency=USD'])), 2)
+
+
+class VacancyAggregateTests(TestCase):
+    def setUp(self):
+        self.first = pd.DataFrame({'name': ['Инженер', 'Программист', 'Инженер'],
+                                   'salary': [30000.0, 50000.0, None],
+                                   'area_name': ['Москва', 'Омск', 'Москва'],
+                                   'published_at': ['2007-12-03T17:34:36+0300'] * 3})
+        self.second = pd.DataFrame({'name': ['Старший инженер', 'Аналитик'],
+                                    'salary': [70000.0, 10001.0],
+                                    'area_name': ['Москва', 'Москва'],
+                                    'published_at': ['2007-01-03T17:34:36+0300', '2008-01-03T17:34:36+0300']})
+
+    def test_merge_aggregates_year_statistics(self):
+        aggregate = merge_aggregates([aggregate_dataframe(self.first, 'нженер', 'Омск'),
+                                      aggregate_dataframe(self.second, 'нженер', 'Омск')])
+        self.assertEqual(aggregate.get_year_statistics(), [[2007, 50000, 3, 50000, 2], [2008, 10001, 1, 0, 0]])
+        self.assertEqual(aggregate.get_year_dataframe(with_area=True)['number_city_by_years'].tolist(), [1, 0])
+
+    def test_region_matrix_matches_single_region(self):
+        merged = merge_aggregates([aggregate_dataframe(self.first, 'нженер', by_region=True),
+                                   aggregate_dataframe(self.second, 'нженер', by_region=True)])
+        for area_name in ('Москва', 'Омск'):
+            single = merge_aggregates([aggregate_dataframe(self.first, 'нженер', area_name),
+                                       aggregate_dataframe(self.second, 'нженер', area_name)])
+            self.assertTrue(merged.get_year_dataframe(True, area_name).equals(single.get_year_dataframe(True)))
+        self.assertEqual(merged.get_region_matrix()[1].loc[2007].to_dict(), {'Москва': 2, 'Омск': 1})
+
+    def test_merge_aggregates_city_statistics(self):
+        merged = merge_aggregates([aggregate_dataframe(self.first, 'нженер'), aggregate_dataframe(self.second, 'нженер')])
+        whole = aggregate_dataframe(pd.concat([self.first, self.second], ignore_index=True), 'нженер')
+        self.assertTrue(merged.get_city_dataframe().equals(whole.get_city_dataframe()))
+        self.assertEqual(merged.get_city_dataframe()['percentage_by_city'].to_dict(), {'Москва': 0.75, 'Омск': 0.25})
+
+
+class ExecutorTests(TestCase):
+    def test_run_tasks_backends(self):
+        tasks = [('part.csv', start, start + size) for start, size in [(0, 10), (10, 5), (15, 30)]]
+        for backend in ('serial', 'threads', 'processes', 'futures'):
+            self.assertEqual(sorted(run_tasks(get_task_size, tasks, backend, max_workers=2)), [5, 10, 30])
+
+    def test_choose_backend_small_input(self):
+        self.assertEqual(choose_backend([1 << 10] * 20), 'serial')
+        self.assertEqual(choose_backend([64 << 20] * 2, workers=1), 'serial')
+        self.assertRaises(ValueError, choose_backend, [1], 'gpu')
+
+
+class RatesProviderTests(TestCase):
+    def test_init_rates_without_file(self):
+        rate_matrix = RateMatrix(['2003-01'], ['USD'], [[31.5]])
+        init_rates('missing_currencies.csv', rate_matrix)
+        self.assertIs(get_rate_matrix('missing_currencies.csv'), rate_matrix)
+        self.assertEqual(get_rate_matrix('missing_currencies.csv').get_rate('2003-01', 'USD'), 31.5)
+
+    def test_get_rate_matrix_reads_once(self):
+        self.assertIs(get_rate_matrix('dataframe_currencies.csv'), get_rate_matrix('dataframe_currencies.csv'))
+
+
+class VectorizedSalaryTests(TestCase):
+    def setUp(self):
+        self.currencies = pd.DataFrame({'date': ['2007-11', '2007-12'], 'USD': [30.5, 29.7], 'EUR': [None, 41.3]})
+        self.rate_matrix = RateMatrix(list(self.currencies['date']), ['USD', 'EUR'],
+                                      self.currencies[['USD', 'EUR']].to_numpy())
+        self.vacancies = pd.DataFrame({
+            'salary_from': [100.7, None, 100.7, 100.7, None, 20000.0, None, 100.0, 100.0, 100.0],
+            'salary_to': [None, 201.9, 201.9, 201.9, None, 30001.0, None, 200.0, 200.0, 200.0],
+            'salary_currency': ['USD', 'USD', 'USD', 'EUR', 'USD', 'RUR', None, None, 'USD', 'EUR'],
+            'published_at': ['2007-12-03T17:34:36+0300'] * 7 + ['2007-11-03T17:34:36+0300',
+                                                                '2008-01-03T17:34:36+0300',
+                                                                '2007-11-03T17:34:36+0300']})
+
+    def get_salary(self, series):
+        """Построчный расчет оклада, который заменили get_salaries"""
+        date = series['published_at'][:7]
+        if not pd.isna(series['salary_from']) and not pd.isna(series['salary_to']):
+            salary = (int(float(series['salary_from'])) + int(float(series['salary_to']))) / 2
+        elif not pd.isna(series['salary_from']):
+            salary = int(float(series['salary_from']))
+        elif not pd.isna(series['salary_to']):
+            salary = int(float(series['salary_to']))
+        else:
+            return float('nan')
+        try:
+            if series['salary_currency'] == 'RUR':
+                return salary
+            return int(salary * self.currencies.loc[self.currencies['date'] == date, series['salary_currency']].values[0])
+        except (KeyError, IndexError, ValueError):
+            return float('nan')
+
+    def test_midpoint_matches_get_salary(self):
+        expected = [100, 201, 150.5, 150.5, None, 25000.5, None, 150, 150, 150]
+        pd.testing.assert_series_equal(get_salary_midpoint(self.vacancies), pd.Series(expected, dtype=float))
+
+    def test_salaries_match_get_salary(self):
+        expected = self.vacancies.apply(self.get_salary, axis=1).astype(float)
+        # от, до, обе границы, евро, нет границ, рубли, нет границ и валюты, нет валюты, нет месяца, нет курса евро
+        self.assertEqual(expected.isna().tolist(), [False] * 4 + [True, False, True, True, True, True])
+        pd.testing.assert_series_equal(get_salaries(self.vacancies, self.rate_matrix), expected)
+
+
+class ProfessionMatcherTests(TestCase):
+    def test_match_overlapping_professions(self):
+        matcher = ProfessionMatcher(['аналитик', 'системный аналитик', 'тик', 'Инженер'])
+        self.assertEqual(matcher.match('Ведущий системный аналитик'), (0, 1, 2))
+        self.assertEqual(matcher.match('Программист'), ())
+
+    def test_professions_statistics_match_single_profession(self):
+        rows = [['IT аналитик', '35000.0', '45000.0', 'RUR', 'Москва', '2007-12-03T17:34:36+0300'],
+                ['Инженер-аналитик', '10000.0', '20000.0', 'RUR', 'Омск', '2008-12-03T17:34:36+0300'],
+                ['Инженер', '50000.0', '70000.0', 'RUR', 'Омск', '2008-10-03T17:34:36+0300']]
+        statistic = VacancyTable(None, rows).calculate_professions_statistics(['аналитик', 'Инженер'])
+        for profession in ('аналитик', 'Инженер'):
+            expected = DataSet(None, rows).calculate_statistics(profession)[2:4]
+            self.assertEqual(statistic[profession], expected)
+            self.assertEqual(DataSet(None, rows).calculate_professions_statistics(['аналитик', 'Инженер'])[profession],
+                             expected)
+
+
+class NameIndexTests(TestCase):
+    def setUp(self):
+        self.names = ['IT аналитик', 'Инженер-программист', 'Системный Аналитик', 'IT аналитик', 'ер']
+
+    def test_get_mask_matches_substring_search(self):
+        index = NameIndex(self.names)
+        for query in ('аналитик', 'Аналитик', 'ер', 'Инженер-про', 'C++', ''):
+            self.assertEqual(index.get_mask(query).tolist(), [query in name for name in self.names])
+
+    def test_get_mask_ignore_case(self):
+        self.assertEqual(NameIndex(self.names).get_mask('аналитик', ignore_case=True).tolist(),
+                         [True, False, True, True, False])
+
+    def test_vacancy_table_uses_name_index(self):
+        rows = [[name, '10000.0', '20000.0', 'RUR', 'Москва', '2007-12-03T17:34:36+0300'] for name in self.names]
+        table = VacancyTable(None, rows)
+        expected = table.calculate_year_statistics('аналитик')
+        index = table.build_name_index()
+        self.assertEqual(index.names, table.name_vocabulary.values)
+        self.assertEqual(len(index), 4)
+        self.assertEqual(table.calculate_year_statistics('аналитик'), expected)
+        self.assertEqual(table.get_profession_mask('аналитик').tolist(), [True, False, False, True, False])
+
+
+class VocabularyTests(TestCase):
+    def test_encode(self):
+        vocabulary = Vocabulary()
+        self.assertEqual([vocabulary.encode(value) for value in ['Москва', 'Омск', 'Москва']], [0, 1, 0])
+        self.assertEqual(vocabulary.values, ['Москва', 'Омск'])
+
+    def test_data_set_shares_strings(self):
+        rows = [['IT аналитик', '35000.0', '45000.0', 'RUR', ''.join(['Моск', 'ва']), '2007-12-03T17:34:36+0300'],
+                ['IT аналитик', '35000.0', '45000.0', 'RUR', ''.join(['Мос', 'ква']), '2008-12-03T17:34:36+0300']]
+        first, second = DataSet(None, rows).vacancies_objects
+        self.assertIs(first.area_name, second.area_name)
+        self.assertIs(first.name, second.name)
+        self.assertEqual((first.area_code, second.area_code), (0, 0))
+
+    def test_read_chunk_categories(self):
+        path = tempfile.mkdtemp()
+        try:
+            file_name = os.path.join(path, 'part.csv')
+            with open(file_name, 'w', encoding='utf-8') as file:
+                file.write('name,salary_from,salary_to,salary_currency,area_name,published_at\n'
+                           'Инженер,1,2,RUR,Москва,2007-12-03T17:34:36+0300\n'
+                           'Инженер,1,,USD,Москва,2007-12-03T17:34:36+0300\n')
+            df = read_chunk(file_name)
+            self.assertEqual(list(df['area_name'].cat.categories), ['Москва'])
+            self.assertEqual(df['salary_currency'].tolist(), ['RUR', 'USD'])
+        finally:
+            shutil.rmtree(path)
+
+
+class DateParsingTests(TestCase):
+    def test_parse_year_month_matches_slicing(self):
+        dates = pd.Series(['2007-12-03T17:34:36+0300', '2022-07-01T00:00:00+0300', None, '2019-1'])
+        years, months = parse_year_month(dates)
+        self.assertEqual(years.tolist(), [2007, 2022, 0, 0])
+        self.assertEqual(months.tolist(), [12, 7, 0, 0])
+
+    def test_vacancy_year_month(self):
+        vacancy = Vacancy(['IT аналитик', '35000.0', '45000.0', 'RUR', 'Москва', '2015-03-03T17:34:36+0300'])
+        self.assertEqual((vacancy.year, vacancy.month), get_year_month('2015-03-01T00:00:00+0300'))
+        self.assertEqual(vacancy.published_at[:2], ('2015', '03'))
+
+
+class SnapshotTests(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.path, '2007_year.csv')
+        with open(self.file_name, 'w', encoding='utf-8') as file:
+            file.write('name,salary_from,salary_to,salary_currency,area_name,published_at\n'
+                       'Инженер,1,2.5,RUR,Москва,2007-12-03T17:34:36+0300\n'
+                       'Аналитик,,3,,Омск,2007-11-03T17:34:36+0300\n'
+                       'Инженер,4,,USD,Москва,\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_snapshot_matches_csv(self):
+        write_snapshot(self.file_name)
+        pd.testing.assert_frame_equal(load_snapshot(self.file_name), read_chunk(self.file_name))
+        for file_name, start, end in split_file(self.file_name, 40):
+            pd.testing.assert_frame_equal(load_snapshot(file_name, start, end),
+                                          read_chunk(file_name, start, end).reset_index(drop=True),
+                                          check_dtype=False, check_categorical=False)
+
+    def test_snapshot_rows(self):
+        with open(self.file_name, 'a', encoding='utf-8') as file:
+            file.write('None,12201,NA,null,NA,2007-10-03T17:34:36+0300\n')
+        write_snapshot(self.file_name)
+        rows, list_naming = read_snapshot_rows(self.file_name)
+        with open(self.file_name, encoding='utf-8') as file:
+            expected = list(csv.reader(file))
+        self.assertEqual(list_naming, expected[0])
+        self.assertEqual(rows, expected[1:])
+
+    def test_stale_snapshot_ignored(self):
+        write_snapshot(self.file_name)
+        with open(self.file_name, 'a', encoding='utf-8') as file:
+            file.write('Инженер,5,6,RUR,Омск,2007-10-03T17:34:36+0300\n')
+        self.assertIsNone(load_snapshot(self.file_name))
+        self.assertEqual(len(read_frame(self.file_name)), 4)
+
+    def test_multiline_file_skipped(self):
+        broken_name = os.path.join(self.path, '2008_year.csv')
+        with open(broken_name, 'w', encoding='utf-8') as file:
+            file.write('name,salary_from,salary_to,salary_currency,area_name,published_at\n'
+                       '"Инженер\nпо качеству",1,2,RUR,Москва,2008-12-03T17:34:36+0300\n')
+        with contextlib.redirect_stdout(io.StringIO()):
+            written = write_snapshots(self.path)
+        self.assertEqual(len(written), 1)
+        self.assertIsNone(read_snapshot_rows(broken_name)[0])
+        self.assertIsNotNone(read_snapshot_rows(self.file_name)[0])
+        table, _ = csv_reader_table(broken_name)
+        self.assertEqual(table.names, ['Инженер\nпо качеству'])
+        table, _ = csv_reader_table(self.file_name, ['area_name=Москва'])
+        self.assertEqual(table.names, ['Инженер'])
+
+
+class AggregateStoreTests(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.store_file = os.path.join(self.path, 'store.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def write_day(self, day, rows):
+        file_name = os.path.join(self.path, f'vacancies_for_{day}.csv')
+        with open(file_name, 'w', encoding='utf-8') as file:
+            file.write('name,salary_from,salary_to,salary_currency,area_name,published_at\n')
+            for name, salary, area in rows:
+                file.write(f'{name},{salary},,RUR,{area},{day}T10:00:00+0300\n')
+        return file_name
+
+    def test_ingest_is_idempotent(self):
+        first = self.write_day('2022-12-20', [('Инженер', 100, 'Москва'), ('Аналитик', 300, 'Омск')])
+        second = self.write_day('2022-12-21', [('Инженер-конструктор', 200, 'Москва')])
+        store = AggregateStore(self.store_file, ['Инженер'])
+        self.assertEqual(store.update([first]), ['2022-12-20'])
+        store = AggregateStore(self.store_file)
+        self.assertEqual(store.update([first, second]), ['2022-12-21'])
+        self.assertEqual(store.update([first, second]), [])
+        aggregate = store.get_aggregate('Инженер', 'Москва')
+        self.assertEqual((aggregate.year_sum, aggregate.year_count), ({2022: 600.0}, {2022: 3}))
+        self.assertEqual((aggregate.profession_sum, aggregate.profession_count), ({2022: 300.0}, {2022: 2}))
+        self.assertEqual(aggregate.area_count, {2022: 2})
+
+    def test_changed_day_replaces_contribution(self):
+        file_name = self.write_day('2022-12-20', [('Инженер', 100, 'Москва')])
+        AggregateStore(self.store_file, ['Инженер']).update([file_name])
+        self.write_day('2022-12-20', [('Инженер', 100, 'Москва'), ('Инженер', 500, 'Омск')])
+        store = AggregateStore(self.store_file)
+        store.update([file_name])
+        aggregate = AggregateStore(self.store_file).get_aggregate('Инженер')
+        self.assertEqual(aggregate.city_count, {'Москва': 1, 'Омск': 1})
+        self.assertEqual(aggregate.year_sum, {2022: 600.0})
+        self.assertEqual(len(os.listdir(f'{self.store_file}.days')), 1)
+
+    def test_update_reads_only_new_days(self):
+        first = self.write_day('2022-12-20', [('Инженер', 100, 'Москва')])
+        second = self.write_day('2022-12-21', [('Аналитик', 300, 'Омск')])
+        AggregateStore(self.store_file, ['Инженер']).update([first])
+        for name in os.listdir(f'{self.store_file}.days'):
+            os.remove(os.path.join(f'{self.store_file}.days', name))
+        store = AggregateStore(self.store_file)
+        self.assertEqual(store.update([first, second]), ['2022-12-21'])
+        self.assertEqual(len(os.listdir(f'{self.store_file}.days')), 1)
+        aggregate = AggregateStore(self.store_file).get_aggregate('Инженер')
+        self.assertEqual((aggregate.year_sum, aggregate.profession_count), ({2022: 400.0}, {2022: 1}))
+
+
+class HhStubHandler(BaseHTTPRequestHandler):
+    requests_params = []
+    fail_second = None
+    slow_second = None
+    lock = threading.Lock()
+    seconds = [hour * 3600 + i * 3600 // number
+               for hour, number in enumerate([4500 if hour == 10 else hour * 7 for hour in range(24)])
+               for i in range(number)]
+
+    def do_GET(self):
+        params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        with self.lock:
+            self.requests_params.append(params)
+        day_start = datetime.fromisoformat(params['date_from'][:10])
+        start, end = [int((datetime.fromisoformat(params[key]) - day_start).total_seconds())
+                      for key in ('date_from', 'date_to')]
+        if self.fail_second is not None and start <= self.fail_second < end and end - start < 86400:
+            self.send_response(500)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if self.slow_second is not None and start <= self.slow_second < end and end - start < 86400:
+            time.sleep(1)
+        page, per_page = int(params['page']), int(params['per_page'])
+        found = [(vacancy_id, second) for vacancy_id, second in enumerate(self.seconds) if start <= second < end]
+        items = [{'id': str(vacancy_id), 'name': f'Вакансия {vacancy_id}',
+                  'salary': {'from': second, 'to': None, 'currency': 'RUR'},
+                  'area': {'name': 'Москва'}, 'published_at': f'{day_start + timedelta(seconds=second)}'}
+                 for vacancy_id, second in found[page * per_page:min((page + 1) * per_page, 2000)]]
+        body = json.dumps({'items': items, 'found': len(found), 'pages': min(-(-len(found) // per_page), 20),
+                           'page': page, 'per_page': per_page}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FlakyStubHandler(BaseHTTPRequestHandler):
+    statuses = []
+    hits = 0
+
+    def do_GET(self):
+        FlakyStubHandler.hits += 1
+        status = self.statuses.pop(0) if self.statuses else 200
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', '1')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CountingLimiter(RateLimiter):
+    acquired = 0
+
+    def acquire(self):
+        self.acquired += 1
+        super().acquire()
+
+
+class CrawlDayTests(TestCase):
+    def setUp(self):
+        HhStubHandler.requests_params = []
+        HhStubHandler.fail_second = None
+        HhStubHandler.slow_second = None
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), HhStubHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}/vacancies'
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.path)
+
+    def test_crawl_full_day(self):
+        file_name = crawl_day(date(2022, 12, 20), max_workers=4, path=self.path, base_url=self.base_url)
+        df = pd.read_csv(file_name)
+        self.assertEqual(df['salary_from'].tolist(), HhStubHandler.seconds)
+        self.assertLessEqual(len(HhStubHandler.requests_params), -(-len(HhStubHandler.seconds) // 100) + 8)
+        self.assertIn('2022-12-21T00:00:00', {params['date_to'] for params in HhStubHandler.requests_params})
+        self.assertFalse(os.path.exists(f'{file_name}.parts'))
+
+    def test_crawl_resumes(self):
+        HhStubHandler.fail_second = 5 * 3600 + 100
+        session = create_session(4, retries=0)
+        self.assertIsNone(crawl_day(date(2022, 12, 20), 4, self.path, self.base_url, session))
+        checkpoint_dir = os.path.join(self.path, 'vacancies_for_2022-12-20.csv.parts')
+        self.assertFalse([name for name in os.listdir(checkpoint_dir) if name.endswith('.tmp')])
+        (missing_start, missing_end), = get_missing_windows(checkpoint_dir)
+        self.assertTrue(missing_start <= HhStubHandler.fail_second < missing_end)
+        HhStubHandler.fail_second = None
+        HhStubHandler.requests_params = []
+        file_name = crawl_day(date(2022, 12, 20), 4, self.path, self.base_url, session)
+        session.close()
+        for params in HhStubHandler.requests_params:
+            self.assertGreaterEqual(params['date_from'], f'2022-12-20T{format_window((missing_start, 0))[:8]}')
+            self.assertLessEqual(params['date_to'], f'2022-12-20T{format_window((missing_end, 0))[:8]}')
+        self.assertEqual(pd.read_csv(file_name)['salary_from'].tolist(), HhStubHandler.seconds)
+
+    def test_crawl_timeout_fails_window(self):
+        HhStubHandler.slow_second = 5 * 3600 + 100
+        timeout = new_vacancies.TIMEOUT
+        new_vacancies.TIMEOUT = (1, 0.2)
+        try:
+            with create_session(4, retries=0) as session:
+                self.assertIsNone(crawl_day(date(2022, 12, 20), 4, self.path, self.base_url, session))
+        finally:
+            new_vacancies.TIMEOUT = timeout
+        (missing_start, missing_end), = get_missing_windows(os.path.join(self.path,
+                                                                         'vacancies_for_2022-12-20.csv.parts'))
+        self.assertTrue(missing_start <= HhStubHandler.slow_second < missing_end)
+
+    def test_crawl_days_skips_seen_vacancies(self):
+        files = crawl_days(date(2022, 12, 20), date(2022, 12, 21), max_days=2, max_workers=2, rate_limit=None,
+                           path=self.path, base_url=self.base_url)
+        frames = [pd.read_csv(file_name) for file_name in files.values()]
+        self.assertEqual(sorted(sum((df['salary_from'].tolist() for df in frames), [])), HhStubHandler.seconds)
+        HhStubHandler.requests_params = []
+        self.assertEqual(crawl_days(date(2022, 12, 20), date(2022, 12, 21), path=self.path, base_url=self.base_url),
+                         {})
+        self.assertEqual(HhStubHandler.requests_params, [])
+        file_name = crawl_days(date(2022, 12, 22), date(2022, 12, 22), rate_limit=None, path=self.path,
+                               base_url=self.base_url)[date(2022, 12, 22)]
+        self.assertEqual(len(pd.read_csv(file_name)), 0)
+
+    def test_rate_limiter(self):
+        limiter = RateLimiter(100)
+        started = time.monotonic()
+        for _ in range(11):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+
+    def test_retries_pass_rate_limiter(self):
+        server = HTTPServer(('127.0.0.1', 0), FlakyStubHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_port}/'
+        try:
+            FlakyStubHandler.statuses, FlakyStubHandler.hits = [503, 503, 503], 0
+            limiter = CountingLimiter(1000)
+            with requests.Session() as session:
+                session.mount('http://', RateLimitedAdapter(limiter, retries=3, backoff_factor=0.01))
+                self.assertEqual(session.get(url).status_code, 200)
+                self.assertEqual((FlakyStubHandler.hits, limiter.acquired), (4, 4))
+                FlakyStubHandler.statuses, FlakyStubHandler.hits = [429], 0
+                started = time.monotonic()
+                self.assertEqual(session.get(url).status_code, 200)
+                self.assertGreaterEqual(time.monotonic() - started, 1)
+                self.assertEqual((FlakyStubHandler.hits, limiter.acquired), (2, 6))
+                FlakyStubHandler.statuses, FlakyStubHandler.hits = [500] * 5, 0
+                self.assertEqual(session.get(url).status_code, 500)
+                self.assertEqual((FlakyStubHandler.hits, limiter.acquired), (4, 10))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_split_busy_window(self):
+        self.assertEqual(split_window((36000, 39600), 4500), [(36000, 37200), (37200, 38400), (38400, 39600)])
+
+    def test_vacancy_writer_streams_pages(self):
+        file_name = os.path.join(self.path, 'part.csv')
+        with VacancyWriter(file_name) as writer:
+            writer.write_page([{'name': 'Инженер', 'salary': {'from': 100, 'to': None, 'currency': 'RUR'},
+                                'area': {'name': 'Омск'}, 'published_at': '2022-12-20T10:00:00+0300'}])
+            writer.write_page([{'name': 'Аналитик', 'salary': None, 'area': {'name': 'Москва'},
+                                'published_at': '2022-12-20T11:00:00+0300'}])
+            self.assertFalse(os.path.exists(file_name))
+        with open(file_name, encoding='utf-8') as file:
+            self.assertEqual(list(csv.reader(file)),
+                             [['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at'],
+                              ['Инженер', '100', '', 'RUR', 'Омск', '2022-12-20T10:00:00+0300'],
+                              ['Аналитик', '', '', '', 'Москва', '2022-12-20T11:00:00+0300']])
+
+
+class EtagStubHandler(BaseHTTPRequestHandler):
+    requests_headers = []
+
+    def do_GET(self):
+        self.requests_headers.append(dict(self.headers))
+        if 'missing' in self.path:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps({'path': self.path}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CachedSessionTests(TestCase):
+    def setUp(self):
+        EtagStubHandler.requests_headers = []
+        self.server = HTTPServer(('127.0.0.1', 0), EtagStubHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}/vacancies'
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.cache_dir)
+
+    def test_immutable_response_is_not_refetched(self):
+        with CachedSession(requests.Session(), self.cache_dir, immutable_after('date', '%Y-%m-%d')) as session:
+            first = session.get(self.base_url, params={'date': '2022-12-20'})
+            second = session.get(self.base_url, params={'date': '2022-12-20'})
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(len(EtagStubHandler.requests_headers), 1)
+        self.assertEqual((session.hits, session.fetched), (1, 1))
+
+    def test_stale_response_is_revalidated(self):
+        session = CachedSession(requests.Session(), self.cache_dir)
+        session.get(self.base_url, params={'date': '2022-12-20'})
+        response = CachedSession(requests.Session(), self.cache_dir).get(self.base_url, params={'date': '2022-12-20'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'path': '/vacancies?date=2022-12-20'})
+        self.assertEqual(EtagStubHandler.requests_headers[1].get('If-None-Match'), '"v1"')
+
+    def test_missing_body_is_refetched(self):
+        session = CachedSession(requests.Session(), self.cache_dir)
+        session.get(self.base_url, params={'date': '2022-12-20'})
+        for directory, _, file_names in os.walk(self.cache_dir):
+            for name in file_names:
+                if name.endswith('.gz'):
+                    os.remove(os.path.join(directory, name))
+        response = session.get(self.base_url, params={'date': '2022-12-20'})
+        self.assertEqual(response.json(), {'path': '/vacancies?date=2022-12-20'})
+        self.assertIsNone(EtagStubHandler.requests_headers[1].get('If-None-Match'))
+        self.assertEqual(session.get(self.base_url, params={'date': '2022-12-20'}).status_code, 200)
+        self.assertEqual(session.revalidated, 1)
+
+    def test_errors_are_not_cached(self):
+        session = CachedSession(requests.Session(), self.cache_dir, lambda params: None)
+        self.assertEqual(session.get(f'{self.base_url}/missing').status_code, 404)
+        self.assertEqual(session.get(f'{self.base_url}/missing').status_code, 404)
+        self.assertEqual(len(EtagStubHandler.requests_headers), 2)
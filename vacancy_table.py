@@ -0,0 +1,346 @@
+import csv
+import math
+from array import array
+
+import numpy as np
+import pandas as pd
+
+from aggregates import VacancyAggregate, add_grouped
+from date_parsing import get_year_month
+from name_index import NameIndex
+from partitioning import parse_filters, row_matches
+from profession_matcher import ProfessionMatcher, get_professions_statistics
+from snapshot import read_snapshot_rows
+from vocabulary import Vocabulary
+
+
+currency_to_rub = {"AZN": 35.68,
+                   "BYR": 23.91,
+                   "EUR": 59.90,
+                   "GEL": 21.74,
+                   "KGS": 0.76,
+                   "KZT": 0.13,
+                   "RUR": 1,
+                   "UAH": 1.64,
+                   "USD": 60.66,
+                   "UZS": 0.0055}
+currencies = list(currency_to_rub.keys())
+currency_codes = {currency: code for code, currency in enumerate(currencies)}
+rates_by_code = np.array([currency_to_rub[currency] for currency in currencies], dtype=np.float64)
+
+
+class VacancyTable:
+    """Колоночное хранилище вакансий. Вместо объектов Vacancy и Salary на каждую строку хранит параллельные массивы
+    чисел, поэтому занимает в несколько раз меньше памяти, а статистика считается без обращения к атрибутам объектов.
+
+    Attributes:
+        file_name (str): Имя исходного файла с данными
+        name_id (array): Коды названий вакансий в словаре name_vocabulary
+        name_vocabulary (Vocabulary): Словарь различных названий вакансий
+        salary_from (array): Нижние границы оклада
+        salary_to (array): Верхние границы оклада
+        currency (array): Коды валют оклада (индексы в списке currencies)
+        year (array): Годы публикации вакансий
+        month (array): Месяцы публикации вакансий
+        area_id (array): Коды регионов в словаре areas
+        areas (Vocabulary): Словарь регионов в порядке их первого появления
+        name_index (NameIndex): Индекс триграмм по названиям вакансий, None - не построен
+        statistic (list): Статистика по вакансиям
+    """
+
+    def __init__(self, file_name=None, rows=None):
+        """Инициализирует объект VacancyTable.
+
+        Args:
+            file_name (str): Имя исходного файла с данными
+            rows (iterable[list[str]]): Строки файла для добавления в таблицу
+
+        >>> len(VacancyTable('unittest.csv', [['IT аналитик', '35000.0', '45000.0','RUR', 'Санкт-Петербург', '2007-12-03T17:34:36+0300']]))
+        1
+        >>> VacancyTable('unittest.csv', [['IT аналитик', '35000.0', '', 'RUR', 'Санкт-Петербург', '2007-12-03T17:34:36+0300']]).names
+        []
+        """
+        self.file_name = file_name
+        self.name_id = array('I')
+        self.name_vocabulary = Vocabulary()
+        self.salary_from = array('d')
+        self.salary_to = array('d')
+        self.currency = array('B')
+        self.year = array('H')
+        self.month = array('B')
+        self.area_id = array('I')
+        self.areas = Vocabulary()
+        self.name_index = None
+        self.statistic = []
+        if rows is not None:
+            self.extend(rows)
+
+    def __len__(self):
+        return len(self.year)
+
+    @property
+    def names(self):
+        """list[str]: Названия вакансий в порядке строк; одинаковые названия - один и тот же объект словаря"""
+        values = self.name_vocabulary.values
+        return [values[code] for code in self.name_id]
+
+    def append(self, row):
+        """Добавляет в таблицу строку файла, если в ней заполнены все значения.
+
+        Args:
+            row (list[str]): Строка файла: название, нижняя и верхняя граница оклада, валюта, регион, дата публикации
+
+        Returns:
+            bool: True, если строка добавлена
+        """
+        if None in row or '' in row:
+            return False
+        self.name_id.append(self.name_vocabulary.encode(row[0].replace('\xa0', '\x20')))
+        self.salary_from.append(int(float(row[1])))
+        self.salary_to.append(int(float(row[2])))
+        self.currency.append(currency_codes[row[3]])
+        year, month = get_year_month(row[5])
+        self.year.append(year)
+        self.month.append(month)
+        self.area_id.append(self.areas.encode(row[4]))
+        self.name_index = None
+        return True
+
+    def extend(self, rows):
+        """Добавляет в таблицу строки файла по одной.
+
+        Args:
+            rows (iterable[list[str]]): Строки файла
+        """
+        for row in rows:
+            self.append(row)
+
+    def columns(self):
+        """Возвращает колонки таблицы в виде массивов NumPy без копирования данных.
+
+        Returns:
+            dict[str: np.ndarray]: Колонки salary_from, salary_to, currency, year, month, area_id
+        """
+        return {'salary_from': np.frombuffer(self.salary_from, dtype=np.float64),
+                'salary_to': np.frombuffer(self.salary_to, dtype=np.float64),
+                'currency': np.frombuffer(self.currency, dtype=np.uint8),
+                'year': np.frombuffer(self.year, dtype=np.uint16),
+                'month': np.frombuffer(self.month, dtype=np.uint8),
+                'area_id': np.frombuffer(self.area_id, dtype=np.uint32)}
+
+    def get_salaries(self):
+        """Вычисляет среднее значение зарплаты каждой вакансии в рублях.
+
+        Returns:
+            np.ndarray: Зарплаты в рублях
+
+        >>> VacancyTable(None, [['IT аналитик', '123000.0', '987000.0', 'AZN', 'Москва', '2007-12-03T17:34:36+0300']]).get_salaries()
+        array([19802400.])
+        """
+        columns = self.columns()
+        return (columns['salary_from'] + columns['salary_to']) / 2 * rates_by_code[columns['currency']]
+
+    def build_name_index(self):
+        """Строит индекс триграмм по различным названиям из словаря name_vocabulary: номер названия в индексе
+        совпадает с его кодом в name_id. После этого get_profession_mask проверяет только названия-кандидаты из
+        индекса, что удобно при многих запросах к одной загруженной таблице.
+
+        Returns:
+            NameIndex: Индекс названий
+        """
+        self.name_index = NameIndex(self.name_vocabulary.values)
+        return self.name_index
+
+    def get_profession_mask(self, profession_name):
+        """Отмечает вакансии, в названии которых встречается название профессии. Если построен индекс названий,
+        то используется он.
+
+        Args:
+            profession_name (str): Название профессии
+
+        Returns:
+            np.ndarray: Маска подходящих вакансий
+        """
+        if self.name_index is not None:
+            name_mask = self.name_index.get_name_mask(profession_name)
+        else:
+            values = self.name_vocabulary.values
+            name_mask = np.fromiter((profession_name in name for name in values), dtype=bool, count=len(values))
+        return name_mask[np.frombuffer(self.name_id, dtype=np.uint32)]
+
+    def calculate_statistics(self, profession_name):
+        """Вычисляет ту же статистику, что и DataSet.calculate_statistics в tabular_statistics: уровень зарплат и
+        количество вакансий по годам (всего и для выбранной профессии), уровень зарплат и доля вакансий по городам
+        (первые 10 значений).
+
+        Args:
+            profession_name (str): Название професии для сбора более конкретной статистики по данной професии
+
+        Returns:
+            list[dict[int: int or str: int]]: Собранная статистика
+
+        >>> VacancyTable('unittest.csv', [['IT аналитик', '35000.0', '45000.0','RUR', 'Санкт-Петербург', '2007-12-03T17:34:36+0300']]).calculate_statistics('аналитик')[4:]
+        [{'Санкт-Петербург': 40000}, {'Санкт-Петербург': 1.0}]
+        """
+        columns = self.columns()
+        salaries = self.get_salaries()
+        profession_mask = self.get_profession_mask(profession_name)
+        years, year_index = np.unique(columns['year'], return_inverse=True)
+        number_vac_by_years = np.bincount(year_index, minlength=len(years))
+        sum_salary_by_years = np.bincount(year_index, weights=salaries, minlength=len(years))
+        number_profession_by_years = np.bincount(year_index[profession_mask], minlength=len(years))
+        sum_salary_by_years_profession = np.bincount(year_index[profession_mask], weights=salaries[profession_mask],
+                                                     minlength=len(years))
+        number_vac_by_city = np.bincount(columns['area_id'], minlength=len(self.areas))
+        sum_salary_by_city = np.bincount(columns['area_id'], weights=salaries, minlength=len(self.areas))
+
+        salary_by_years = {year: 0 for year in range(2007, 2023)}
+        number_vac_by_years_dict = {year: 0 for year in range(2007, 2023)}
+        salary_by_years_profession = {year: 0 for year in range(2007, 2023)}
+        number_profession_by_years_dict = {year: 0 for year in range(2007, 2023)}
+        for i, year in enumerate(years.tolist()):
+            salary_by_years[year] = math.floor(sum_salary_by_years[i] / number_vac_by_years[i])
+            number_vac_by_years_dict[year] = int(number_vac_by_years[i])
+            number_profession_by_years_dict[year] = int(number_profession_by_years[i])
+            if number_profession_by_years[i] != 0:
+                salary_by_years_profession[year] = math.floor(
+                    sum_salary_by_years_profession[i] / number_profession_by_years[i])
+
+        salary_by_city = {}
+        percentage_vac_by_city = {}
+        for area_id, city in enumerate(self.areas.values):
+            proportion_vacancy = number_vac_by_city[area_id] / len(self)
+            if proportion_vacancy >= 0.01:
+                percentage_vac_by_city[city] = round(float(proportion_vacancy), 4)
+                salary_by_city[city] = math.floor(sum_salary_by_city[area_id] / number_vac_by_city[area_id])
+
+        self.statistic = [dict(sorted(salary_by_years.items())),
+                          dict(sorted(number_vac_by_years_dict.items())),
+                          dict(sorted(salary_by_years_profession.items())),
+                          dict(sorted(number_profession_by_years_dict.items())),
+                          dict(sorted(salary_by_city.items(), key=lambda x: -x[1])[:10]),
+                          dict(sorted(percentage_vac_by_city.items(), key=lambda x: -x[1])[:10])]
+        return self.statistic
+
+    def calculate_year_statistics(self, profession_name):
+        """Вычисляет статистику по вакансиям одного года в формате DataSet.calculate_year_statistics из
+        multiprocessing_statistic: год, уровень зарплат, количество вакансий, уровень зарплат и количество вакансий
+        для выбранной профессии.
+
+        Args:
+            profession_name (str): Название професии для сбора более конкретной статистики по данной професии
+
+        Returns:
+            list: Собранная статистика
+
+        >>> VacancyTable('unittest.csv', [['IT аналитик', '35000.0', '45000.0','RUR', 'Санкт-Петербург', '2007-12-03T17:34:36+0300']]).calculate_year_statistics('аналитик')
+        ['2007', 40000, 1, 40000, 1]
+        """
+        salaries = self.get_salaries()
+        profession_salaries = salaries[self.get_profession_mask(profession_name)]
+        number_vac_by_years = len(salaries)
+        number_profession_by_years = len(profession_salaries)
+        salary_by_years = math.floor(salaries.sum() / number_vac_by_years)
+        salary_by_years_profession = 0
+        if number_profession_by_years != 0:
+            salary_by_years_profession = math.floor(profession_salaries.sum() / number_profession_by_years)
+
+        self.statistic = [str(self.year[0]), salary_by_years, number_vac_by_years, salary_by_years_profession,
+                          number_profession_by_years]
+        return self.statistic
+
+    def get_aggregate(self, profession_name):
+        """Вычисляет частичную статистику по годам: суммы зарплат и количества вакансий, всего и для выбранной
+        профессии. Частичные статистики таблиц разных разделов, в том числе разделов одного года, объединяются
+        merge_aggregates.
+
+        Args:
+            profession_name (str): Название професии для сбора более конкретной статистики по данной професии
+
+        Returns:
+            VacancyAggregate: Частичная статистика
+
+        >>> aggregate = VacancyTable(None, [['IT аналитик', '35000.0', '45000.0','RUR', 'Москва', '2007-12-03T17:34:36+0300']]).get_aggregate('аналитик')
+        >>> aggregate.get_year_statistics()
+        [[2007, 40000, 1, 40000, 1]]
+        """
+        aggregate = VacancyAggregate()
+        years = pd.Series(self.columns()['year'].astype(np.int64))
+        salaries = pd.Series(self.get_salaries())
+        profession_mask = self.get_profession_mask(profession_name)
+        add_grouped(aggregate.year_sum, aggregate.year_count, years, salaries)
+        add_grouped(aggregate.profession_sum, aggregate.profession_count, years[profession_mask],
+                    salaries[profession_mask])
+        return aggregate
+
+    def calculate_professions_statistics(self, professions):
+        """Вычисляет уровень зарплат и количество вакансий по годам сразу для нескольких профессий за один проход по
+        названиям вакансий, в формате DataSet.calculate_professions_statistics из tabular_statistics.
+
+        Args:
+            professions (list[str]): Названия профессий
+
+        Returns:
+            dict[str: list[dict[int: int]]]: Для каждой профессии: уровень зарплат по годам, количество вакансий по
+            годам
+
+        >>> statistic = VacancyTable(None, [['IT аналитик', '35000.0', '45000.0','RUR', 'Москва', '2007-12-03T17:34:36+0300']]).calculate_professions_statistics(['аналитик', 'IT'])
+        >>> statistic['IT'][0][2007], statistic['аналитик'][1][2008]
+        (40000, 0)
+        """
+        matcher = ProfessionMatcher(professions)
+        name_matches = np.zeros((len(matcher.professions), len(self.name_vocabulary)), dtype=bool)
+        for code, name in enumerate(self.name_vocabulary.values):
+            name_matches[list(matcher.match(name)), code] = True
+        name_id = np.frombuffer(self.name_id, dtype=np.uint32)
+        matched_rows = [np.flatnonzero(name_matches[index][name_id]) for index in range(len(matcher.professions))]
+        rows = np.concatenate(matched_rows + [np.empty(0, dtype=np.int64)])
+        indices = np.repeat(np.arange(len(matched_rows)), [len(matched) for matched in matched_rows])
+        years, year_index = np.unique(self.columns()['year'][rows], return_inverse=True)
+        keys = indices * len(years) + year_index
+        size = len(matcher.professions) * len(years)
+        sums = np.bincount(keys, weights=self.get_salaries()[rows], minlength=size)
+        counts = np.bincount(keys, minlength=size)
+        sum_salary = {}
+        number_vacancies = {}
+        for key in np.flatnonzero(counts).tolist():
+            index, year = divmod(key, len(years))
+            sum_salary[(index, int(years[year]))] = float(sums[key])
+            number_vacancies[(index, int(years[year]))] = int(counts[key])
+        return get_professions_statistics(sum_salary, number_vacancies, matcher.professions)
+
+
+def csv_reader_table(file_name, filters=()):
+    """Построчно читает файл в колоночную таблицу, не создавая объекты на каждую вакансию. Если для файла есть
+    актуальный снимок (snapshot.write_snapshot), строки берутся из него без разбора csv.
+
+    Args:
+       file_name (str): Название файла для чтения
+       filters (iterable[str or tuple]): Условия фильтрации строк, например "area_name=Москва"
+
+    Returns:
+        VacancyTable, list: Таблица вакансий, строчка с названиями столбцов
+    """
+    filters = parse_filters(filters)
+    rows, list_naming = read_snapshot_rows(file_name)
+    if list_naming is not None:
+        return VacancyTable(file_name, filter_rows(rows, filters)), list_naming
+    with open(file_name, encoding="utf-8-sig") as file:
+        reader = csv.reader(file)
+        list_naming = next(reader, None)
+        return VacancyTable(file_name, filter_rows(reader, filters)), list_naming
+
+
+def filter_rows(rows, filters):
+    """Оставляет строки, подходящие под все условия.
+
+    Args:
+        rows (iterable[list[str]]): Строки файла
+        filters (list[tuple]): Условия фильтрации строк из parse_filters
+
+    Returns:
+        iterable[list[str]]: Подходящие строки
+    """
+    if not filters:
+        return rows
+    return (row for row in rows if row_matches(row, filters))
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from date_parsing import parse_year_month
+
+
+def get_salary_midpoint(df):
+    """Вычисляет среднее значение оклада: полусумму границ, а если одной из границ нет, то оставшуюся границу.
+
+    Args:
+        df (pd.DataFrame): Вакансии со столбцами salary_from и salary_to
+
+    Returns:
+        pd.Series: Оклад в валюте вакансии, NaN если не указана ни одна граница
+
+    >>> get_salary_midpoint(pd.DataFrame({'salary_from': [10.9, 10, None, None], 'salary_to': [21.0, None, 30, None]})).tolist()
+    [15.5, 10.0, 30.0, nan]
+    """
+    salary_from = np.trunc(pd.to_numeric(df['salary_from'], errors='coerce'))
+    salary_to = np.trunc(pd.to_numeric(df['salary_to'], errors='coerce'))
+    return ((salary_from + salary_to) / 2).fillna(salary_from).fillna(salary_to)
+
+
+def get_salaries(df, rate_matrix):
+    """Векторно вычисляет оклад каждой вакансии в рублях. Результат совпадает с построчным get_salary: рублевые
+    оклады не округляются, остальные умножаются на курс месяца публикации и отбрасывают дробную часть.
+
+    Args:
+        df (pd.DataFrame): Вакансии со столбцами salary_from, salary_to, salary_currency, published_at
+        rate_matrix (RateMatrix): Матрица курсов валют по месяцам
+
+    Returns:
+        pd.Series: Оклад в рублях, NaN если его невозможно вычислить
+
+    >>> from rate_matrix import RateMatrix
+    >>> rates = RateMatrix(['2007-12'], ['USD'], np.array([[30.0]]))
+    >>> vacancies = pd.DataFrame({'salary_from': [100.0, 100.0, 100.0], 'salary_to': [201.0, None, None],
+    ...                           'salary_currency': ['RUR', 'USD', 'EUR'],
+    ...                           'published_at': ['2007-12-03T17:34:36+0300'] * 3})
+    >>> get_salaries(vacancies, rates).tolist()
+    [150.5, 3000.0, nan]
+    """
+    salary = get_salary_midpoint(df).to_numpy()
+    currency = df['salary_currency'].to_numpy(dtype=object)
+    years, months = parse_year_month(df['published_at'])
+    rates = rate_matrix.get_rates(years, months, currency)
+    return pd.Series(np.where(currency == 'RUR', salary, np.trunc(salary * rates)), index=df.index)
@@ -0,0 +1,59 @@
+class Vocabulary:
+    """Словарь для кодирования повторяющихся строк целыми числами. Каждое различное значение хранится один раз, а
+    строки данных хранят только его код, поэтому группировка по столбцу сводится к работе с целыми числами.
+
+    Attributes:
+        values (list[str]): Значения в порядке их первого появления, индекс значения - его код
+        codes (dict[str: int]): Коды значений
+    """
+
+    def __init__(self, values=()):
+        """Инициализирует словарь.
+
+        Args:
+            values (iterable[str]): Начальные значения
+
+        >>> vocabulary = Vocabulary(['RUR', 'USD'])
+        >>> vocabulary.encode('EUR'), vocabulary.encode('RUR'), vocabulary[2], len(vocabulary)
+        (2, 0, 'EUR', 3)
+        """
+        self.values = []
+        self.codes = {}
+        for value in values:
+            self.encode(value)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, code):
+        return self.values[code]
+
+    def __contains__(self, value):
+        return value in self.codes
+
+    def encode(self, value):
+        """Возвращает код значения, добавляя значение в словарь при первом появлении.
+
+        Args:
+            value (str): Значение
+
+        Returns:
+            int: Код значения
+        """
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def intern(self, value):
+        """Возвращает хранящийся в словаре экземпляр значения, чтобы одинаковые строки разных вакансий были одним
+        объектом.
+
+        Args:
+            value (str): Значение
+
+        Returns:
+            str: Значение из словаря
+        """
+        return self.values[self.encode(value)]